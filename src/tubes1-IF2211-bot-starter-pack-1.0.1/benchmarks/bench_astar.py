@@ -0,0 +1,87 @@
+"""
+original.find_path_a_star against the previous sorted-list implementation,
+on boards from the standard 15x15 up to 100x100, checking both return the
+same path.
+
+    python benchmarks/bench_astar.py
+"""
+import random
+
+from payloads import make_board_payload, timed
+
+from decode import decode
+from game.logic.original10 import original
+from game.model_decoder import from_dict
+from game.models import Board, Position
+
+
+class legacy(original):
+    def find_path_a_star(self, board, start, goal, avoid=None):
+        self.path = []
+        self.path_index = 0
+        visited = set()
+        start_key, goal_key = (start.x, start.y), (goal.x, goal.y)
+        frontier = [(0, start_key)]
+        came_from = {start_key: None}
+        cost_so_far = {start_key: 0}
+        visited.add(start_key)
+        while frontier:
+            frontier.sort(key=lambda x: x[0])
+            _, current_key = frontier.pop(0)
+            if current_key == goal_key:
+                path = [Position(x=current_key[0], y=current_key[1])]
+                while current_key != start_key and current_key is not None:
+                    current_key = came_from.get(current_key)
+                    if current_key is not None:
+                        path.insert(0, Position(x=current_key[0], y=current_key[1]))
+                    else:
+                        return False
+                self.path = path
+                return True
+            current_pos = Position(x=current_key[0], y=current_key[1])
+            for next_pos in self.get_neighbors(board, current_pos):
+                next_key = (next_pos.x, next_pos.y)
+                if next_key not in visited:
+                    new_cost = cost_so_far[current_key] + 1
+                    cost_so_far[next_key] = new_cost
+                    priority = new_cost + self.heuristic(
+                        next_pos, Position(x=goal_key[0], y=goal_key[1])
+                    )
+                    frontier.append((priority, next_key))
+                    came_from[next_key] = current_key
+                    visited.add(next_key)
+        return False
+
+
+def search_all(logic, board, pairs):
+    paths = []
+    for start, goal in pairs:
+        logic.find_path_a_star(board, start, goal)
+        paths.append([(p.x, p.y) for p in logic.path])
+    return paths
+
+
+if __name__ == "__main__":
+    print("{:>9} {:>12} {:>12} {:>8}".format("board", "legacy ms", "heap ms", "speedup"))
+    for size in (15, 30, 60, 100):
+        board = from_dict(
+            Board,
+            decode(make_board_payload(diamonds=size * size // 10, width=size, height=size)),
+        )
+        rnd = random.Random(size)
+        pairs = [
+            (
+                Position(x=rnd.randrange(size), y=rnd.randrange(size)),
+                Position(x=rnd.randrange(size), y=rnd.randrange(size)),
+            )
+            for _ in range(10)
+        ]
+        assert search_all(legacy(), board, pairs) == search_all(original(), board, pairs)
+        number = 1 if size >= 60 else 5
+        slow = timed(search_all, legacy(), board, pairs, repeat=3, number=number) / len(pairs)
+        fast = timed(search_all, original(), board, pairs, repeat=3, number=number) / len(pairs)
+        print(
+            "{:>9} {:>12.3f} {:>12.3f} {:>7.1f}x".format(
+                "{0}x{0}".format(size), slow * 1000, fast * 1000, slow / fast
+            )
+        )
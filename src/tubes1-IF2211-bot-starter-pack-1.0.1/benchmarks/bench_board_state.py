@@ -0,0 +1,99 @@
+"""
+Decoding and indexing a new snapshot from scratch against
+BoardStateStore.decode, which only decodes the objects that differ from the
+previous snapshot and updates the indexes for the changes. Between the two
+snapshots every bot moved one cell, the first one onto the cell of the last
+diamond, and, in the second case, one diamond was picked up. The diamond
+density is used after every snapshot. The incremental indexes and density
+are checked against a full rebuild, cell lists in order, also with a diamond
+turned from blue to red or back under the same id.
+
+    python benchmarks/bench_board_state.py
+"""
+import copy
+
+from payloads import make_board_payload, timed
+
+from decode import decode
+from game.board_state import BoardStateStore
+from game.model_decoder import from_dict
+from game.models import Board
+
+
+def next_payload(payload: dict, take_diamond: bool) -> dict:
+    payload = copy.deepcopy(payload)
+    objects = payload["game_objects"]
+    last_diamond = next(o for o in reversed(objects) if o["type"] == "DiamondGameObject")
+    first_bot = True
+    for obj in objects:
+        if obj["type"] == "BotGameObject":
+            if first_bot:
+                obj["position"] = dict(last_diamond["position"])
+                first_bot = False
+            else:
+                obj["position"]["x"] = (obj["position"]["x"] + 1) % payload["width"]
+            obj["properties"]["milliseconds_left"] -= 100
+    if take_diamond:
+        index = next(i for i, o in enumerate(objects) if o["type"] == "DiamondGameObject")
+        del objects[index]
+    return payload
+
+
+def recolour(payload: dict) -> dict:
+    payload = copy.deepcopy(payload)
+    diamond = next(o for o in payload["game_objects"] if o["type"] == "DiamondGameObject")
+    diamond["properties"]["points"] = 3 - diamond["properties"]["points"]
+    return payload
+
+
+def full(payload):
+    board = from_dict(Board, payload)
+    board._build_indexes()
+    board.density.square(0, 0, 1)
+    return board
+
+
+def check_indexes(board, payload):
+    rebuilt = full(payload)
+    ids = lambda index: {key: [o.id for o in objects] for key, objects in index.items()}
+    assert ids(board._by_cell) == ids(rebuilt._by_cell)
+    assert ids(board._by_type) == ids(rebuilt._by_type)
+    everything = (board.width // 2, board.height // 2, board.width + board.height)
+    assert board.density.square(*everything) == rebuilt.density.square(*everything)
+
+
+def incremental(store, previous, payload):
+    store.board, store._raw = previous
+    board = store.decode(payload)
+    board.density.square(0, 0, 1)
+    return board
+
+
+if __name__ == "__main__":
+    print(
+        "{:>7} {:>9} {:>14} {:>10} {:>10} {:>8}".format(
+            "board", "diamonds", "change", "full ms", "diff ms", "speedup"
+        )
+    )
+    for size, diamonds in ((15, 22), (30, 400), (70, 5000)):
+        first = decode(make_board_payload(diamonds=diamonds, width=size, height=size))
+        for take_diamond in (False, True):
+            second = next_payload(first, take_diamond)
+            store = BoardStateStore()
+            store.decode(first).density
+            previous = (store.board, store._raw)
+            check_indexes(incremental(store, previous, second), second)
+            recoloured = recolour(second)
+            check_indexes(incremental(store, previous, recoloured), recoloured)
+            slow = timed(full, second)
+            fast = timed(incremental, store, previous, second)
+            print(
+                "{:>7} {:>9} {:>14} {:>10.3f} {:>10.3f} {:>7.1f}x".format(
+                    "{0}x{0}".format(size),
+                    diamonds,
+                    "bots + diamond" if take_diamond else "bots moved",
+                    slow * 1000,
+                    fast * 1000,
+                    slow / fast,
+                )
+            )
@@ -0,0 +1,52 @@
+"""
+Compare decode.decode with the previous two-pass implementation on large
+board payloads and check that both produce identical output.
+
+    python benchmarks/bench_decode.py
+"""
+import json
+import re
+
+from payloads import make_board_payload, timed
+
+from decode import decode
+
+
+def _legacy_snake_case(value):
+    first_underscore = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", value)
+    return re.sub("([a-z0-9])([A-Z])", r"\1_\2", first_underscore).lower()
+
+
+def _legacy_decode_keys(data):
+    formatted = {}
+    snake = {_legacy_snake_case(key): value for key, value in data.items()}
+    for key, value in snake.items():
+        if isinstance(value, dict):
+            formatted[key] = _legacy_decode_keys(value)
+        elif isinstance(value, list) and len(value) > 0:
+            formatted[key] = []
+            for _, val in enumerate(value):
+                formatted[key].append(_legacy_decode_keys(val))
+        else:
+            formatted[key] = value
+    return formatted
+
+
+def legacy_decode(data):
+    if isinstance(data, dict):
+        return _legacy_decode_keys(data)
+    return [_legacy_decode_keys(item) for item in data]
+
+
+if __name__ == "__main__":
+    print("{:>9} {:>12} {:>12} {:>8}".format("diamonds", "legacy ms", "decode ms", "speedup"))
+    for diamonds in (20, 100, 500, 2000):
+        payload = make_board_payload(diamonds=diamonds, width=60, height=60)
+        assert json.dumps(decode(payload)) == json.dumps(legacy_decode(payload))
+        legacy = timed(legacy_decode, payload)
+        fast = timed(decode, payload)
+        print(
+            "{:>9} {:>12.3f} {:>12.3f} {:>7.1f}x".format(
+                diamonds, legacy * 1000, fast * 1000, legacy / fast
+            )
+        )
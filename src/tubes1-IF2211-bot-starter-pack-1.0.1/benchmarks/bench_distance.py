@@ -0,0 +1,76 @@
+"""
+Teleporter aware distances from the bot to every diamond: the pairwise
+teleporter loop the logic modules used against game.distance fields, with
+the field cache cleared first (cold) and warm, for 1 and 4 teleporter pairs.
+
+    python benchmarks/bench_distance.py
+"""
+from payloads import make_board_payload, timed
+
+from decode import decode
+from game.distance import DistanceFields, _source_field
+from game.model_decoder import from_dict
+from game.models import Board
+
+
+def loop_distances(board, source):
+    # greedy12.get_best_path before the distance fields
+    distances = []
+    teleporters = board.teleporters
+    for diamond in board.diamonds:
+        pos = diamond.position
+        min_dist = abs(source.x - pos.x) + abs(source.y - pos.y)
+        for tp_a in teleporters:
+            if tp_a.position == source:
+                continue
+            for tp_b in teleporters:
+                if tp_a is not tp_b:
+                    dist = (
+                        abs(source.x - tp_a.position.x) + abs(source.y - tp_a.position.y) + 1 +
+                        abs(tp_b.position.x - pos.x) + abs(tp_b.position.y - pos.y)
+                    )
+                    min_dist = min(min_dist, dist)
+        distances.append(min_dist)
+    return distances
+
+
+def field_distances(board, source, cold=True):
+    if cold:
+        _source_field.cache_clear()
+    fields = DistanceFields(board.width, board.height, board.teleporters)
+    return [fields.between(source, d.position) for d in board.diamonds]
+
+
+if __name__ == "__main__":
+    print(
+        "{:>7} {:>9} {:>6} {:>10} {:>10} {:>10} {:>8}".format(
+            "board", "diamonds", "pairs", "loop ms", "cold ms", "warm ms", "speedup"
+        )
+    )
+    for size, diamonds in ((15, 22), (30, 400), (70, 5000)):
+        for pairs in (1, 4):
+            board = from_dict(
+                Board,
+                decode(
+                    make_board_payload(
+                        diamonds=diamonds, width=size, height=size, teleporters=2 * pairs
+                    )
+                ),
+            )
+            source = board.bots[0].position
+            for checked in (source, board.teleporters[0].position):
+                assert loop_distances(board, checked) == field_distances(board, checked)
+            slow = timed(loop_distances, board, source)
+            cold = timed(field_distances, board, source)
+            warm = timed(field_distances, board, source, False)
+            print(
+                "{:>7} {:>9} {:>6} {:>10.3f} {:>10.3f} {:>10.3f} {:>7.1f}x".format(
+                    "{0}x{0}".format(size),
+                    diamonds,
+                    pairs,
+                    slow * 1000,
+                    cold * 1000,
+                    warm * 1000,
+                    slow / cold,
+                )
+            )
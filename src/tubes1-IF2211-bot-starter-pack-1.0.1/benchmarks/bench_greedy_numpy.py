@@ -0,0 +1,70 @@
+"""
+greedy12 target selection: greedy12.heuristic called once per diamond
+against the NumPy backend scoring every diamond at once, from 50 to 5000
+diamonds. The board's lazy state (columns, density, distance fields) is
+dropped before every call, so both sides pay for what they build. Both must
+pick the same diamond, with and without red diamonds ignored.
+
+    python benchmarks/bench_greedy_numpy.py
+"""
+from payloads import make_board_payload, timed
+
+from decode import decode
+from game.distance import _source_field
+from game.logic.greedy12 import greedy12
+from game.logic.greedy12_numpy import score_targets
+from game.model_decoder import from_dict
+from game.models import Board
+
+
+def fresh(board):
+    _source_field.cache_clear()
+    board._columns = board._density = board._distances = None
+
+
+def python_target(logic, board, diamonds, ignore_red, time_left):
+    fresh(board)
+    return min(
+        diamonds,
+        key=lambda d: logic.heuristic(logic.position, d.position, board, ignore_red, time_left),
+    )
+
+
+def numpy_target(logic, board, diamonds, ignore_red, time_left):
+    fresh(board)
+    scores = score_targets(logic, board, diamonds, logic.position, ignore_red, time_left)
+    return diamonds[int(scores.argmin())]
+
+
+if __name__ == "__main__":
+    print(
+        "{:>7} {:>9} {:>11} {:>11} {:>11} {:>8}".format(
+            "board", "diamonds", "ignore red", "python ms", "numpy ms", "speedup"
+        )
+    )
+    for size, diamonds in ((15, 50), (20, 150), (30, 400), (50, 1500), (70, 5000)):
+        board = from_dict(
+            Board, decode(make_board_payload(diamonds=diamonds, width=size, height=size))
+        )
+        logic = greedy12()
+        bot = board.bots[0]
+        logic.position = bot.position
+        time_left = bot.properties.milliseconds_left
+        for ignore_red in (False, True):
+            candidates = board.diamonds
+            if ignore_red:
+                candidates = [d for d in candidates if d.properties.points == 1]
+            args = (logic, board, candidates, ignore_red, time_left)
+            assert python_target(*args) is numpy_target(*args)
+            slow = timed(python_target, *args)
+            fast = timed(numpy_target, *args)
+            print(
+                "{:>7} {:>9} {:>11} {:>11.3f} {:>11.3f} {:>7.1f}x".format(
+                    "{0}x{0}".format(size),
+                    diamonds,
+                    "yes" if ignore_red else "no",
+                    slow * 1000,
+                    fast * 1000,
+                    slow / fast,
+                )
+            )
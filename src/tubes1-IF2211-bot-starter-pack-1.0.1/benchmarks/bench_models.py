@@ -0,0 +1,40 @@
+"""
+Compare the generated decoders of game.model_decoder with dacite.from_dict
+when building a Board from a decoded response, check both build equal
+models, and report the memory a decoded board takes per game object.
+
+    python benchmarks/bench_models.py
+"""
+import tracemalloc
+
+import dacite
+from payloads import make_board_payload, timed
+
+from decode import decode
+from game import model_decoder
+from game.models import Board
+
+if __name__ == "__main__":
+    print("{:>9} {:>12} {:>12} {:>8}".format("objects", "dacite ms", "compiled ms", "speedup"))
+    for diamonds in (20, 100, 500, 2000):
+        data = decode(make_board_payload(diamonds=diamonds, width=60, height=60))
+        assert dacite.from_dict(Board, data) == model_decoder.from_dict(Board, data)
+        slow = timed(dacite.from_dict, Board, data, number=5)
+        fast = timed(model_decoder.from_dict, Board, data, number=5)
+        print(
+            "{:>9} {:>12.3f} {:>12.3f} {:>7.1f}x".format(
+                len(data["game_objects"]), slow * 1000, fast * 1000, slow / fast
+            )
+        )
+
+    data = decode(make_board_payload(diamonds=2000, width=60, height=60))
+    tracemalloc.start()
+    board = model_decoder.from_dict(Board, data)
+    board.columns
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        "memory: {:.0f} bytes per game object including columns".format(
+            size / len(board.game_objects)
+        )
+    )
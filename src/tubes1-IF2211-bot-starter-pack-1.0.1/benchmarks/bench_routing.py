@@ -0,0 +1,60 @@
+"""
+Time greedy12's trip planner (game/logic/routing.py) on boards from the usual
+15x15 to large ones, with an empty inventory (the most subsets to search) and
+with 3 diamonds carried. DistanceFields.matrix is checked against the fields,
+also from a teleporter's cell.
+
+    python benchmarks/bench_routing.py
+"""
+from payloads import make_board_payload, timed
+
+from decode import decode
+from game.logic.routing import RoutePlanner
+from game.model_decoder import from_dict
+from game.models import Board
+
+
+def check_matrix(board, positions):
+    matrix = board.distances.matrix(positions)
+    for a, row in zip(positions, matrix):
+        assert row == [board.distances.field(a.x, a.y)[b.y * board.width + b.x] for b in positions]
+
+
+if __name__ == "__main__":
+    print(
+        "{:>7} {:>9} {:>6} {:>9} {:>6} {:>9}".format(
+            "board", "diamonds", "pairs", "carrying", "stops", "plan ms"
+        )
+    )
+    for size, diamonds in ((15, 22), (30, 400), (70, 5000)):
+        for pairs in (1, 4):
+            board = from_dict(
+                Board,
+                decode(
+                    make_board_payload(
+                        diamonds=diamonds, width=size, height=size, teleporters=2 * pairs
+                    )
+                ),
+            )
+            bot = board.bots[0]
+            check_matrix(
+                board,
+                [bot.position, board.teleporters[0].position]
+                + [d.position for d in board.diamonds[:20]],
+            )
+            for carrying in (0, 3):
+                bot.properties.diamonds = carrying
+                bot.properties.milliseconds_left = 60000
+                planner = RoutePlanner()
+                route = planner.plan(bot, board)
+                seconds = timed(planner.plan, bot, board)
+                print(
+                    "{:>7} {:>9} {:>6} {:>9} {:>6} {:>9.3f}".format(
+                        "{0}x{0}".format(size),
+                        diamonds,
+                        pairs,
+                        carrying,
+                        len(route or ()),
+                        seconds * 1000,
+                    )
+                )
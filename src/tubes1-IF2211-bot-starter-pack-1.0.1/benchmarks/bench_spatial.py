@@ -0,0 +1,103 @@
+"""
+Cluster values for every diamond on a board: the previous all-pairs scans
+against the summed-area tables of game.spatial (build included), on a
+full-size board and a board with 4x the area.
+
+    python benchmarks/bench_spatial.py
+"""
+from payloads import make_board_payload, timed
+
+from decode import decode
+from game.logic.greedy12 import greedy12
+from game.model_decoder import from_dict
+from game.models import Board
+from game.spatial import DiamondDensity
+
+RADIUS = 2
+
+
+def scan_square(board):
+    return [
+        sum(
+            2 if o.properties.points == 2 else 1
+            for o in board.diamonds
+            if abs(o.position.x - d.position.x) <= RADIUS
+            and abs(o.position.y - d.position.y) <= RADIUS
+        )
+        for d in board.diamonds
+    ]
+
+
+def scan_manhattan(board):
+    return [
+        sum(
+            2 if o.properties.points == 2 else 1
+            for o in board.diamonds
+            if abs(o.position.x - d.position.x) + abs(o.position.y - d.position.y)
+            <= RADIUS
+        )
+        for d in board.diamonds
+    ]
+
+
+def scan_greedy12(board):
+    # greedy12.get_cluster_value before the summed-area tables
+    logic = greedy12()
+    return [
+        sum(
+            logic.get_weight(o, board)
+            for o in board.diamonds
+            if abs(o.position.x - d.position.x) <= RADIUS
+            and abs(o.position.y - d.position.y) <= RADIUS
+        )
+        for d in board.diamonds
+    ]
+
+
+def table_greedy12(board):
+    board._density = None
+    logic = greedy12()
+    return [logic.get_cluster_value(d.position, board, False) for d in board.diamonds]
+
+
+def table_square(board):
+    density = DiamondDensity(board.width, board.height, board.diamonds)
+    values = []
+    for d in board.diamonds:
+        blue, red = density.square(d.position.x, d.position.y, RADIUS)
+        values.append(blue + 2 * red)
+    return values
+
+
+def table_manhattan(board):
+    density = DiamondDensity(board.width, board.height, board.diamonds)
+    values = []
+    for d in board.diamonds:
+        blue, red = density.manhattan(d.position.x, d.position.y, RADIUS)
+        values.append(blue + 2 * red)
+    return values
+
+
+if __name__ == "__main__":
+    print(
+        "{:>7} {:>9} {:>10} {:>10} {:>10} {:>8}".format(
+            "board", "diamonds", "window", "scan ms", "table ms", "speedup"
+        )
+    )
+    for size, diamonds in ((15, 22), (15, 100), (30, 90), (30, 400)):
+        board = from_dict(
+            Board, decode(make_board_payload(diamonds=diamonds, width=size, height=size))
+        )
+        for window, scan, table in (
+            ("square", scan_square, table_square),
+            ("manhattan", scan_manhattan, table_manhattan),
+            ("greedy12", scan_greedy12, table_greedy12),
+        ):
+            assert scan(board) == table(board)
+            slow = timed(scan, board)
+            fast = timed(table, board)
+            print(
+                "{:>7} {:>9} {:>10} {:>10.3f} {:>10.3f} {:>7.1f}x".format(
+                    "{0}x{0}".format(size), diamonds, window, slow * 1000, fast * 1000, slow / fast
+                )
+            )
@@ -0,0 +1,118 @@
+"""
+Synthetic board payloads shaped like the responses of the game engine, for
+benchmarks that should not need a running server.
+"""
+import os
+import random
+import sys
+
+# Let the benchmarks import the bot packages when run as scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_board_payload(
+    diamonds: int = 500,
+    width: int = 15,
+    height: int = 15,
+    bots: int = 4,
+    teleporters: int = 2,
+    red_ratio: float = 0.2,
+    seed: int = 0,
+) -> dict:
+    """
+    Build a camel case board dict as returned by GET /boards/:id. When there
+    are more objects than cells, positions are allowed to repeat.
+    """
+    rnd = random.Random(seed)
+    cells = [(x, y) for y in range(height) for x in range(width)]
+    rnd.shuffle(cells)
+    needed = diamonds + 2 * bots + teleporters + 1
+    while len(cells) < needed:
+        cells += cells[: needed - len(cells)]
+    cells = iter(cells)
+    next_id = iter(range(1, needed + 1))
+    game_objects = []
+
+    def position():
+        x, y = next(cells)
+        return {"x": x, "y": y}
+
+    for i in range(bots):
+        base = position()
+        game_objects.append(
+            {
+                "id": next(next_id),
+                "position": position(),
+                "type": "BotGameObject",
+                "properties": {
+                    "diamonds": rnd.randint(0, 4),
+                    "score": rnd.randint(0, 30),
+                    "name": "bot{}".format(i),
+                    "inventorySize": 5,
+                    "canTackle": True,
+                    "millisecondsLeft": rnd.randint(1000, 60000),
+                    "timeJoined": "2025-01-01T00:00:00.000Z",
+                    "base": base,
+                },
+            }
+        )
+        game_objects.append(
+            {
+                "id": next(next_id),
+                "position": dict(base),
+                "type": "BaseGameObject",
+                "properties": {"name": "bot{}".format(i)},
+            }
+        )
+    for i in range(teleporters):
+        game_objects.append(
+            {
+                "id": next(next_id),
+                "position": position(),
+                "type": "TeleportGameObject",
+                "properties": {"pairId": str(i // 2 + 1)},
+            }
+        )
+    game_objects.append(
+        {
+            "id": next(next_id),
+            "position": position(),
+            "type": "DiamondButtonGameObject",
+            "properties": {},
+        }
+    )
+    for _ in range(diamonds):
+        game_objects.append(
+            {
+                "id": next(next_id),
+                "position": position(),
+                "type": "DiamondGameObject",
+                "properties": {"points": 2 if rnd.random() < red_ratio else 1},
+            }
+        )
+    return {
+        "id": 1,
+        "width": width,
+        "height": height,
+        "minimumDelayBetweenMoves": 100,
+        "features": [
+            {
+                "name": "DiamondProvider",
+                "config": {
+                    "generationRatio": 0.1,
+                    "minRatioForGeneration": 0.01,
+                    "redRatio": red_ratio,
+                },
+            },
+            {"name": "BotProvider", "config": {"inventorySize": 5, "canTackle": True}},
+            {"name": "TeleportProvider", "config": {"pairs": teleporters // 2}},
+        ],
+        "gameObjects": game_objects,
+    }
+
+
+def timed(func, *args, repeat: int = 5, number: int = 20) -> float:
+    """Best average seconds per call of func(*args) over `repeat` runs."""
+    import timeit
+
+    return min(timeit.repeat(lambda: func(*args), repeat=repeat, number=number)) / number
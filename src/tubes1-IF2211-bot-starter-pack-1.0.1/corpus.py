@@ -0,0 +1,180 @@
+"""
+Turn recorded games into a memory-mapped corpus and run logic controllers
+over every tick of it.
+
+`build` converts logs written with `main.py --record` into one corpus file
+(see game/corpus.py). `run` replays every recorded session into each logic,
+one job per session and logic spread over a process pool. The workers map
+the same file, so the corpus is read from the page cache and never loaded as
+a whole. The result is the throughput in ticks per second per core and how
+many moves match the recorded ones.
+
+    python corpus.py build corpus.bin games/*.log
+    python corpus.py run corpus.bin --logic greedy12 original --processes 4
+"""
+import argparse
+import multiprocessing
+import random
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+from colorama import Fore, Style, init
+from game.bot_handler import BotHandler
+from game.controllers import CONTROLLERS
+from game.corpus import BoardBuilder, Corpus, CorpusWriter
+from game.models import Bot
+from game.recording import read_recording
+
+
+def build(output: str, recordings: List[str]) -> CorpusWriter:
+    writer = CorpusWriter(output)
+    for path in recordings:
+        current = None
+        for session, data, move in read_recording(path):
+            if session is not current:
+                current = session
+                writer.start(dict(session, recording=path), data.get("features") or [])
+            writer.add(data, move)
+    writer.close()
+    return writer
+
+
+def evaluate(job: Tuple[str, str, int]) -> Tuple[str, Dict[str, float]]:
+    """Replay one session of the corpus into a new instance of a logic."""
+    path, logic, session = job
+    # RandomLogic draws from the global generator
+    random.seed(session)
+    totals = {"ticks": 0, "decisions": 0, "compared": 0, "matched": 0, "seconds": 0.0}
+    with Corpus(path) as corpus:
+        bot = Bot(name=corpus.sessions[session]["bot"], email="", id="")
+        builder = BoardBuilder(corpus, session)
+        bot_logic = CONTROLLERS[logic]()
+        decided = None
+        start = perf_counter()
+        for tick in corpus.ticks(session):
+            if decided is not None and tick.move is not None:
+                totals["compared"] += 1
+                totals["matched"] += decided == tick.move
+            totals["ticks"] += 1
+            board = builder.build(tick)
+            board_bot = board.get_bot(bot)
+            decided = None
+            if board_bot is None:
+                continue
+            delta_x, delta_y = bot_logic.next_move(board_bot, board)
+            totals["decisions"] += 1
+            try:
+                decided = BotHandler._get_direction(delta_x, delta_y)
+            except Exception:
+                decided = None
+        totals["seconds"] = perf_counter() - start
+    return logic, totals
+
+
+def print_table(results: Dict[str, Dict[str, float]]):
+    header = "{:<10} {:>10} {:>10} {:>16} {:>14}".format(
+        "logic", "ticks", "decisions", "same move", "ticks/s/core"
+    )
+    print(Style.BRIGHT + header + Style.RESET_ALL)
+    for logic, totals in results.items():
+        compared = totals["compared"]
+        print(
+            "{:<10} {:>10} {:>10} {:>16} {:>14.0f}".format(
+                logic,
+                totals["ticks"],
+                totals["decisions"],
+                "{} ({:.0%})".format(totals["matched"], totals["matched"] / compared)
+                if compared
+                else "-",
+                totals["ticks"] / (totals["seconds"] or 1e-9),
+            )
+        )
+
+
+if __name__ == "__main__":
+    init()
+    parser = argparse.ArgumentParser(
+        description="Build a corpus from recorded games and run logic controllers over it"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="Convert recordings into a corpus")
+    build_parser.add_argument("corpus", help="Corpus file to write")
+    build_parser.add_argument(
+        "recordings", nargs="+", help="Files written by main.py --record"
+    )
+    run_parser = commands.add_parser("run", help="Run logic controllers over a corpus")
+    run_parser.add_argument("corpus", help="Corpus file to read")
+    run_parser.add_argument(
+        "--logic",
+        help="Logic controllers to run. Default: all of {}".format(", ".join(CONTROLLERS)),
+        nargs="+",
+        default=list(CONTROLLERS),
+    )
+    run_parser.add_argument(
+        "--processes",
+        help="Worker processes. Default: one per core",
+        default=multiprocessing.cpu_count(),
+        type=int,
+    )
+    args = parser.parse_args()
+
+    if args.command == "build":
+        writer = build(args.corpus, args.recordings)
+        print(
+            Style.BRIGHT + "Corpus:" + Style.RESET_ALL,
+            "{} ticks in {} sessions written to {}".format(
+                len(writer.offsets), len(writer.sessions), args.corpus
+            ),
+        )
+        if writer.skipped:
+            print(
+                Fore.YELLOW + Style.BRIGHT + "Warn:" + Style.RESET_ALL,
+                "{} objects of unknown types were left out".format(writer.skipped),
+            )
+        exit()
+
+    invalid = [name for name in args.logic if name not in CONTROLLERS]
+    if invalid:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + "Error: "
+            + Style.RESET_ALL
+            + "Invalid logic controller: {}".format(", ".join(invalid))
+        )
+        exit(1)
+
+    with Corpus(args.corpus) as corpus:
+        sessions = len(corpus.sessions)
+        ticks = len(corpus)
+    jobs = [
+        (args.corpus, logic, session)
+        for logic in args.logic
+        for session in range(sessions)
+    ]
+    processes = max(1, min(args.processes, len(jobs)))
+    print(
+        Fore.BLUE + Style.BRIGHT + "Corpus:" + Style.RESET_ALL,
+        "{} ticks in {} sessions, {} logics on {} processes".format(
+            ticks, sessions, len(args.logic), processes
+        ),
+    )
+
+    start = perf_counter()
+    results = {logic: None for logic in args.logic}
+    with multiprocessing.Pool(processes) as pool:
+        for logic, totals in pool.imap_unordered(evaluate, jobs):
+            if results[logic] is None:
+                results[logic] = totals
+            else:
+                for key, value in totals.items():
+                    results[logic][key] += value
+    elapsed = perf_counter() - start
+
+    print_table(results)
+    print(
+        Style.BRIGHT + "Time:" + Style.RESET_ALL,
+        "{:.1f} s, {:.0f} ticks/s on {} processes".format(
+            elapsed, ticks * len(args.logic) / elapsed, processes
+        ),
+    )
@@ -1,10 +1,11 @@
 import re
 
+# Upper bound on the number of distinct keys remembered by _snake_case_cached.
+# The API only uses a few dozen keys, the bound keeps unexpected payloads from
+# growing the table without limit.
+SNAKE_CASE_CACHE_SIZE = 1024
 
-def _unpack(data):
-    if isinstance(data, dict):
-        return data.items()
-    return data
+_snake_case_cache = {}
 
 
 def _snake_case(value):
@@ -17,13 +18,19 @@ def _snake_case(value):
     return re.sub("([a-z0-9])([A-Z])", r"\1_\2", first_underscore).lower()
 
 
-def _keys_to_snake_case(content):
+def _snake_case_cached(value):
     """
-    Convert all keys for given dict to snake case
-    :param content: dict
-    :return: dict
+    Convert camel case string to snake case, remembering the result
+    :param value: string
+    :return: string
     """
-    return {_snake_case(key): value for key, value in content.items()}
+    try:
+        return _snake_case_cache[value]
+    except KeyError:
+        converted = _snake_case(value)
+        if len(_snake_case_cache) < SNAKE_CASE_CACHE_SIZE:
+            _snake_case_cache[value] = converted
+        return converted
 
 
 def decode_keys(data):
@@ -33,15 +40,13 @@ def decode_keys(data):
     :return: dict
     """
     formatted = {}
-    for key, value in _unpack(_keys_to_snake_case(data)):
+    for key, value in data.items():
+        key = _snake_case_cached(key)
         if isinstance(value, dict):
-            formatted[key] = decode_keys(value)
-        elif isinstance(value, list) and len(value) > 0:
-            formatted[key] = []
-            for _, val in enumerate(value):
-                formatted[key].append(decode_keys(val))
-        else:
-            formatted[key] = value
+            value = decode_keys(value)
+        elif isinstance(value, list) and value:
+            value = [decode_keys(val) for val in value]
+        formatted[key] = value
     return formatted
 
 
@@ -49,7 +54,4 @@ def decode(data):
     if isinstance(data, dict):
         return decode_keys(data)
 
-    formatted = []
-    for item in data:
-        formatted.append(decode_keys(item))
-    return formatted
+    return [decode_keys(item) for item in data]
@@ -1,22 +1,109 @@
 import json
-from dataclasses import dataclass
-from typing import List, Optional, Tuple, Union
+from collections import deque
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Deque, List, Optional, Tuple, Union
 
 import requests
 from colorama import Back, Fore, Style, init
-from dacite import from_dict
+from game.model_decoder import from_dict
+from game.board_state import BoardStateStore
 from decode import decode
 from game.models import Board, Bot
+from game.profiling import NO_PHASE, PhaseProfiler
+from game.recording import BoardRecorder
 from requests import Response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+@dataclass
+class RequestTiming:
+    method: str
+    endpoint: str
+    status: int
+    # Seconds from sending the request until the response headers were parsed
+    # (includes the TCP handshake when a new connection had to be opened)
+    wait: float
+    # Seconds spent reading the response body after the headers
+    transfer: float
+    new_connection: bool
 
 
 @dataclass
 class Api:
     url: str
+    pool_size: int = 10
+    retries: int = 3
+    connect_timeout: float = 3.05
+    read_timeout: float = 5.0
+    session: Optional[requests.Session] = field(default=None, repr=False)
+    timings: Deque[RequestTiming] = field(
+        default_factory=lambda: deque(maxlen=1000), repr=False
+    )
+    # Set by --profile to time the http, decode and from_dict phases
+    profiler: Optional[PhaseProfiler] = field(default=None, repr=False)
+    # Set by --record to log every board snapshot received
+    recorder: Optional[BoardRecorder] = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.session is None:
+            self.session = self._create_session()
+
+    def _create_session(self) -> requests.Session:
+        """
+        Create a keep-alive session so consecutive moves reuse the same TCP
+        connection instead of doing a handshake for every request.
+        Only failed connection attempts are retried; a POST that reached the
+        server (e.g. a move) is never sent twice.
+        """
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=0,
+            status=0,
+            backoff_factor=0.05,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.headers.update({"Content-Type": "application/json"})
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def close(self):
+        self.session.close()
+
+    def _phase(self, name: str):
+        if self.profiler is None:
+            return NO_PHASE
+        return self.profiler.phase(name)
+
+    def _from_dict(self, data_class, data):
+        with self._phase("from_dict"):
+            return from_dict(data_class, data)
+
+    def _decode_board(
+        self, data: dict, store: Optional[BoardStateStore], move: Optional[str] = None
+    ) -> Board:
+        if self.recorder is not None:
+            self.recorder.record(data, move)
+        if store is None:
+            return self._from_dict(Board, data)
+        with self._phase("from_dict"):
+            return store.decode(data)
 
     def _get_url(self, endpoint: str) -> str:
         return "{}{}".format(self.url, endpoint)
 
+    def _connections_opened(self, url: str) -> int:
+        pools = self.session.get_adapter(url).poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
     def _req(self, endpoint: str, method: str, body: dict) -> Response:
         print(
             ">>> {} {} {}".format(
@@ -25,20 +112,62 @@ class Api:
                 body,
             )
         )
-        func = getattr(requests, method)
-        headers = {"Content-Type": "application/json"}
-        res = func(self._get_url(endpoint), headers=headers, data=json.dumps(body))
+        url = self._get_url(endpoint)
+        connections_before = self._connections_opened(url)
+        start = perf_counter()
+        with self._phase("http"):
+            res = self.session.request(
+                method.upper(),
+                url,
+                data=json.dumps(body),
+                timeout=(self.connect_timeout, self.read_timeout),
+            )
+        total = perf_counter() - start
+        wait = res.elapsed.total_seconds()
+        timing = RequestTiming(
+            method=method,
+            endpoint=endpoint,
+            status=res.status_code,
+            wait=wait,
+            transfer=max(0.0, total - wait),
+            new_connection=self._connections_opened(url) > connections_before,
+        )
+        self.timings.append(timing)
+        timing_text = "({:.1f} ms + {:.1f} ms, {})".format(
+            timing.wait * 1000,
+            timing.transfer * 1000,
+            "new connection" if timing.new_connection else "reused",
+        )
         if res.status_code == 200:
-            print("<<< {} OK".format(res.status_code))
+            print("<<< {} OK {}".format(res.status_code, timing_text))
         else:
-            print("<<< {} {}".format(res.status_code, res.text))
+            print("<<< {} {} {}".format(res.status_code, res.text, timing_text))
         return res
 
+    def timing_summary(self) -> dict:
+        """
+        Summarize the recorded request timings (in milliseconds) and how many
+        requests had to open a new connection.
+        """
+        if not self.timings:
+            return {"requests": 0}
+        waits = sorted(t.wait for t in self.timings)
+        transfers = [t.transfer for t in self.timings]
+        new_connections = sum(1 for t in self.timings if t.new_connection)
+        return {
+            "requests": len(self.timings),
+            "new_connections": new_connections,
+            "reuse_ratio": 1 - new_connections / len(self.timings),
+            "wait_ms_avg": 1000 * sum(waits) / len(waits),
+            "wait_ms_p95": 1000 * waits[int(0.95 * (len(waits) - 1))],
+            "transfer_ms_avg": 1000 * sum(transfers) / len(transfers),
+        }
+
     def bots_get(self, bot_token: str) -> Optional[Bot]:
         response = self._req("/bots/{}".format(bot_token), "get", {})
         data, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Bot, data)
+            return self._from_dict(Bot, data)
         return None
 
     def bots_register(
@@ -51,14 +180,14 @@ class Api:
         )
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Bot, resp)
+            return self._from_dict(Bot, resp)
         return None
 
     def boards_list(self) -> Optional[List[Board]]:
         response = self._req("/boards", "get", {})
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return [from_dict(Board, board) for board in resp]
+            return [self._from_dict(Board, board) for board in resp]
         return None
 
     def bots_join(self, bot_token: str, board_id: int) -> bool:
@@ -71,14 +200,21 @@ class Api:
             return True
         return False
 
-    def boards_get(self, board_id: str) -> Optional[Board]:
+    def boards_get(
+        self, board_id: str, store: Optional[BoardStateStore] = None
+    ) -> Optional[Board]:
         response = self._req("/boards/{}".format(board_id), "get", {})
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Board, resp)
+            return self._decode_board(resp, store)
         return None
 
-    def bots_move(self, bot_token: str, direction: str) -> Optional[Board]:
+    def bots_move(
+        self,
+        bot_token: str,
+        direction: str,
+        store: Optional[BoardStateStore] = None,
+    ) -> Optional[Board]:
         response = self._req(
             "/bots/{}/move".format(bot_token),
             "post",
@@ -86,7 +222,7 @@ class Api:
         )
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Board, resp)
+            return self._decode_board(resp, store, direction)
         return None
 
     def bots_recover(self, email: str, password: str) -> Optional[str]:
@@ -104,10 +240,11 @@ class Api:
     def _return_response_and_status(
         self, response: Response
     ) -> Tuple[Union[dict, List], int]:
-        resp = response.json()
+        with self._phase("decode"):
+            resp = response.json()
 
-        response_data = resp.get("data") if isinstance(resp, dict) else resp
-        if not response_data:
-            response_data = resp
+            response_data = resp.get("data") if isinstance(resp, dict) else resp
+            if not response_data:
+                response_data = resp
 
-        return decode(response_data), response.status_code
+            return decode(response_data), response.status_code
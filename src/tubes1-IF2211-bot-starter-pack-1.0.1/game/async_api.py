@@ -0,0 +1,64 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from game.api import Api
+from game.board_state import BoardStateStore
+from game.models import Board, Bot
+
+
+@dataclass
+class AsyncApi:
+    """
+    Asyncio front for Api. Requests run on a small thread pool on top of the
+    pooled keep-alive session, so awaiting a response never blocks the event
+    loop and several requests (e.g. from several bots) can be in flight at once.
+    """
+
+    api: Api
+    executor: Optional[ThreadPoolExecutor] = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.api.pool_size, thread_name_prefix="api"
+            )
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def bots_get(self, bot_token: str) -> Optional[Bot]:
+        return await self._run(self.api.bots_get, bot_token)
+
+    async def bots_register(
+        self, name: str, email: str, password: str, team: str
+    ) -> Optional[Bot]:
+        return await self._run(self.api.bots_register, name, email, password, team)
+
+    async def boards_list(self) -> Optional[List[Board]]:
+        return await self._run(self.api.boards_list)
+
+    async def bots_join(self, bot_token: str, board_id: int) -> bool:
+        return await self._run(self.api.bots_join, bot_token, board_id)
+
+    async def boards_get(
+        self, board_id: str, store: Optional[BoardStateStore] = None
+    ) -> Optional[Board]:
+        return await self._run(self.api.boards_get, board_id, store)
+
+    async def bots_move(
+        self,
+        bot_token: str,
+        direction: str,
+        store: Optional[BoardStateStore] = None,
+    ) -> Optional[Board]:
+        return await self._run(self.api.bots_move, bot_token, direction, store)
+
+    async def bots_recover(self, email: str, password: str) -> Optional[str]:
+        return await self._run(self.api.bots_recover, email, password)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.api.close()
@@ -0,0 +1,97 @@
+from typing import Optional
+
+from colorama import Fore, Style
+from game.board_handler import AsyncBoardHandler
+from game.board_state import BoardStateStore
+from game.bot_handler import AsyncBotHandler
+from game.logic.base import BaseLogic
+from game.models import Board, Bot
+from game.pacing import MovePacer
+from game.profiling import NO_PHASE, PhaseProfiler
+from game.speculation import SpeculativePlanner
+
+
+async def play(
+    bot_handler: AsyncBotHandler,
+    board_handler: AsyncBoardHandler,
+    bot: Bot,
+    board_id: int,
+    bot_logic: BaseLogic,
+    pacer: MovePacer,
+    profiler: Optional[PhaseProfiler] = None,
+    refine: bool = False,
+    speculator: Optional[SpeculativePlanner] = None,
+    store: Optional[BoardStateStore] = None,
+    board: Optional[Board] = None,
+) -> None:
+    """
+    Play one game session on the event loop.
+
+    Instead of sleeping a fixed time after every response, each move is
+    scheduled by the pacer against the board's minimum delay between moves.
+    The next move is calculated as soon as the response arrives, so logic time
+    is hidden inside the wait for the deadline, and awaiting the network leaves
+    the loop free for other bots. With `refine` the logic may use the wait to
+    finish planning (see BaseLogic.refine), which blocks the loop, so it is only
+    for a bot that has the loop to itself. A `speculator` (the SpeculativePlanner
+    that `bot_logic` is or wraps) plans ahead in its own thread while a move is
+    awaited.
+
+    `board` is the board already read to set up the pacer, decoded with
+    `store`, so the game starts from it instead of reading it again.
+    """
+    phase = profiler.phase if profiler else lambda name: NO_PHASE
+    # Each response is decoded against the previous one, see board.changes
+    if store is None:
+        store = BoardStateStore()
+    if board is None:
+        board = await board_handler.get_board(board_id, store)
+    if not board:
+        return
+
+    while True:
+        # Find our info among the bots on the board
+        board_bot = board.get_bot(bot)
+        if not board_bot:
+            # Managed to get game over
+            break
+
+        # Calculate next move while the rate limit is still running
+        with phase("next_move"):
+            delta_x, delta_y = bot_logic.next_move(board_bot, board)
+
+        # Don't spam the board more than it allows!
+        if refine and pacer.next_move_at is not None:
+            with phase("refine"):
+                bot_logic.refine(pacer.next_move_at)
+        with phase("sleep"):
+            await pacer.wait_async()
+
+        if not board.is_valid_move(board_bot.position, delta_x, delta_y):
+            print(
+                Fore.YELLOW + Style.BRIGHT + "Warn:" + Style.RESET_ALL,
+                "Invalid move will be ignored."
+                + f" Your move: ({delta_x}, {delta_y}). Your position: ({board_bot.position.x}, {board_bot.position.y})",
+            )
+            pacer.skipped()
+            board = await board_handler.get_board(board_id, store)
+            if not board:
+                break
+            continue
+
+        pacer.moved()
+        if speculator:
+            speculator.speculate(board_bot, board, (delta_x, delta_y))
+        try:
+            # Try to perform move
+            board = await bot_handler.move(
+                bot.id, board_id, delta_x, delta_y, store
+            )
+        except Exception:
+            break
+
+        if not board:
+            # Read new board state
+            board = await board_handler.get_board(board_id, store)
+            if not board:
+                break
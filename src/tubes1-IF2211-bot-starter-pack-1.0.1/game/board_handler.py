@@ -1,6 +1,8 @@
 from dataclasses import dataclass
-from typing import Union, List
+from typing import Union, List, Optional
 from game.api import Api
+from game.async_api import AsyncApi
+from game.board_state import BoardStateStore
 from game.models import Board
 
 @dataclass
@@ -10,5 +12,20 @@ class BoardHandler:
     def list_boards(self) -> List[Board]:
         return self.api.boards_list()
 
-    def get_board(self, board_id: int) -> Board:
-        return self.api.boards_get(board_id)
+    def get_board(
+        self, board_id: int, store: Optional[BoardStateStore] = None
+    ) -> Board:
+        return self.api.boards_get(board_id, store)
+
+
+@dataclass
+class AsyncBoardHandler:
+    api: AsyncApi
+
+    async def list_boards(self) -> List[Board]:
+        return await self.api.boards_list()
+
+    async def get_board(
+        self, board_id: int, store: Optional[BoardStateStore] = None
+    ) -> Board:
+        return await self.api.boards_get(board_id, store)
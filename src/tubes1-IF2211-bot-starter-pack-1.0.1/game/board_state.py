@@ -0,0 +1,166 @@
+from typing import Dict, List, Optional, Tuple
+
+from game.model_decoder import from_dict
+from game.models import Board, ChangeSet, GameObject
+
+
+class BoardStateStore:
+    """
+    Follows the snapshots of one board, as seen by one bot, and turns each
+    into a ChangeSet against the previous one, matched by object id.
+
+    `decode` takes the snake case board dict of a response and only builds
+    GameObjects for the objects whose dict differs from the previous
+    snapshot, every other object is the instance from the previous board.
+    The new board's indexes are then derived from the previous ones (see
+    Board._update_indexes) and the diamond density is reused when no diamond
+    changed. Each object costs one dict lookup and one dict comparison (both
+    in C), everything else grows with the number of changes.
+
+    `update` does the same for an already decoded Board, e.g. from the
+    simulator. There only bots are compared by their properties, the
+    properties of the other objects (diamond points, teleporter pairs, base
+    owners) never change while they are on the board.
+    """
+
+    def __init__(self):
+        self.board: Optional[Board] = None
+        self._raw: Dict[int, dict] = {}
+        self.snapshots = 0
+        self.full_updates = 0
+        self.objects_changed = 0
+
+    def reset(self):
+        self.board = None
+        self._raw = {}
+
+    def _follows(self, board_id: int, width: int, height: int) -> bool:
+        previous = self.board
+        return previous is not None and (
+            previous.id,
+            previous.width,
+            previous.height,
+        ) == (board_id, width, height)
+
+    def _finish(self, board: Board, changes: ChangeSet) -> Board:
+        if changes.full:
+            board._build_indexes()
+            self.full_updates += 1
+        else:
+            board._update_indexes(self.board, changes)
+        board.changes = changes
+        self.board = board
+        self.snapshots += 1
+        self.objects_changed += len(changes)
+        return board
+
+    def decode(self, data: dict) -> Board:
+        """Decode a snake case board dict against the previous snapshot."""
+        raw_objects: List[dict] = data.get("game_objects") or []
+        if not self._follows(data["id"], data["width"], data["height"]):
+            board = from_dict(Board, data)
+            self._raw = {raw["id"]: raw for raw in raw_objects}
+            changes = ChangeSet(added=list(board.game_objects or []), full=True)
+            return self._finish(board, changes)
+
+        previous_raw = self._raw
+        previous_by_id = self.board._by_id
+        changes = ChangeSet()
+        game_objects = []
+        matched = 0
+        for raw in raw_objects:
+            before_raw = previous_raw.get(raw["id"])
+            if before_raw is None:
+                obj = from_dict(GameObject, raw)
+                changes.added.append(obj)
+                game_objects.append(obj)
+                continue
+            matched += 1
+            before = previous_by_id[raw["id"]]
+            if before_raw == raw:
+                game_objects.append(before)
+                continue
+            obj = from_dict(GameObject, raw)
+            game_objects.append(obj)
+            self._classify(before, obj, changes)
+        if matched < len(previous_raw):
+            seen = {raw["id"] for raw in raw_objects}
+            self._add_removed(previous_by_id, seen, changes)
+        self._raw = {raw["id"]: raw for raw in raw_objects}
+
+        board = from_dict(Board, dict(data, game_objects=[]))
+        board.game_objects = game_objects
+        return self._finish(board, changes)
+
+    def update(self, board: Board) -> ChangeSet:
+        """Compare a decoded `board` with the previous snapshot."""
+        if not self._follows(board.id, board.width, board.height):
+            changes = ChangeSet(added=list(board.game_objects or []), full=True)
+            self._finish(board, changes)
+            return changes
+
+        previous_by_id = self.board._by_id
+        changes = ChangeSet()
+        game_objects = board.game_objects or []
+        matched = 0
+        for index, obj in enumerate(game_objects):
+            before = previous_by_id.get(obj.id)
+            if before is None:
+                changes.added.append(obj)
+                continue
+            matched += 1
+            if (
+                before.type == obj.type
+                and before.position.x == obj.position.x
+                and before.position.y == obj.position.y
+                and (obj.type != "BotGameObject" or before.properties == obj.properties)
+            ):
+                game_objects[index] = before
+            else:
+                self._classify(before, obj, changes)
+        if matched < len(previous_by_id):
+            seen = {obj.id for obj in game_objects}
+            self._add_removed(previous_by_id, seen, changes)
+        self._finish(board, changes)
+        return changes
+
+    def apply(
+        self,
+        board: Board,
+        added: List[GameObject],
+        removed: List[GameObject],
+        replaced: List[Tuple[GameObject, GameObject]],
+    ) -> ChangeSet:
+        """
+        Take a `board` whose differences to the previous snapshot are already
+        known, e.g. from a corpus, without comparing its objects: `replaced`
+        holds (before, after) pairs of objects with the same id.
+        """
+        if not self._follows(board.id, board.width, board.height):
+            return self.update(board)
+        changes = ChangeSet(added=added, removed=removed)
+        for before, after in replaced:
+            self._classify(before, after, changes)
+        self._finish(board, changes)
+        return changes
+
+    @staticmethod
+    def _classify(before: GameObject, after: GameObject, changes: ChangeSet):
+        if before.type != after.type:
+            changes.removed.append(before)
+            changes.added.append(after)
+        elif (
+            before.position.x != after.position.x
+            or before.position.y != after.position.y
+        ):
+            changes.moved.append((before, after))
+        else:
+            changes.changed.append((before, after))
+
+    @staticmethod
+    def _add_removed(previous_by_id: Dict[int, GameObject], seen: set, changes: ChangeSet):
+        changes.removed.extend(
+            before
+            for object_id, before in previous_by_id.items()
+            if object_id not in seen
+        )
@@ -5,6 +5,8 @@ from typing import Optional
 
 import requests
 from game.api import Api
+from game.async_api import AsyncApi
+from game.board_state import BoardStateStore
 from game.models import Board, Bot
 
 
@@ -31,9 +33,16 @@ class BotHandler:
     def join(self, token: str, board_id: int) -> bool:
         return self.api.bots_join(token, board_id)
 
-    def move(self, token: str, board_id: int, dx: int, dy: int) -> Optional[Board]:
+    def move(
+        self,
+        token: str,
+        board_id: int,
+        dx: int,
+        dy: int,
+        store: Optional[BoardStateStore] = None,
+    ) -> Optional[Board]:
         # TODO: Returns board??
-        return self.api.bots_move(token, BotHandler._get_direction(dx, dy))
+        return self.api.bots_move(token, BotHandler._get_direction(dx, dy), store)
 
     def register(
         self, name: str, email: str, password: str, team: str
@@ -42,3 +51,34 @@ class BotHandler:
 
     def recover(self, email: str, password: str) -> Optional[str]:
         return self.api.bots_recover(email, password)
+
+
+@dataclass
+class AsyncBotHandler:
+    api: AsyncApi
+
+    async def get_my_info(self, token: str) -> Bot:
+        return await self.api.bots_get(token)
+
+    async def join(self, token: str, board_id: int) -> bool:
+        return await self.api.bots_join(token, board_id)
+
+    async def move(
+        self,
+        token: str,
+        board_id: int,
+        dx: int,
+        dy: int,
+        store: Optional[BoardStateStore] = None,
+    ) -> Optional[Board]:
+        return await self.api.bots_move(
+            token, BotHandler._get_direction(dx, dy), store
+        )
+
+    async def register(
+        self, name: str, email: str, password: str, team: str
+    ) -> Optional[Bot]:
+        return await self.api.bots_register(name, email, password, team)
+
+    async def recover(self, email: str, password: str) -> Optional[str]:
+        return await self.api.bots_recover(email, password)
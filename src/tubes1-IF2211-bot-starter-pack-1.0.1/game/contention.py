@@ -0,0 +1,101 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+# Steps of an opponent to a cell no opponent can go for
+UNREACHABLE = 1 << 30
+
+
+def _nearest(fields: List[array]) -> Optional[array]:
+    """Cell by cell minimum of distance fields, a multi-source search from all of their sources."""
+    if not fields:
+        return None
+    if len(fields) == 1:
+        return fields[0]
+    return array("i", map(min, *fields))
+
+
+class ContentionMap:
+    """
+    Where the other bots on a board get before one bot, for one snapshot.
+
+    The board has no walls, so a breadth-first search started from every
+    opponent at once reaches a cell after the minimum of the opponents'
+    distance fields (see game.distance), taken cell by cell in one pass.
+    Only opponents with room in their inventory count: one for a blue
+    diamond and two for a red one, so there is a field for each. A diamond
+    is contested when an opponent that can pick it up gets there in fewer
+    steps than the bot, a tie is left to the move order.
+
+    Opponents do not go for every diamond they are nearest to, so a diamond
+    only counts as lost if it is also the nearest one an opponent has room
+    for, the one it is most likely heading to.
+
+    Tackling sends a bot home and hands over its diamonds, as many as fit
+    in the attacker's inventory. An opponent that can tackle and has room
+    threatens every cell it reaches with one move.
+    """
+
+    def __init__(self, board, board_bot):
+        self.width = board.width
+        distances = board.distances
+        position = board_bot.position
+        self.ours = distances.field(position.x, position.y)
+        self.opponents = [bot for bot in board.bots if bot.id != board_bot.id]
+        fields = []
+        for bot in self.opponents:
+            props = bot.properties
+            room = props.inventory_size - props.diamonds
+            fields.append((distances.field(bot.position.x, bot.position.y), room, props.can_tackle))
+        self.blue = _nearest([field for field, room, _ in fields if room >= 1])
+        self.red = _nearest([field for field, room, _ in fields if room >= 2])
+        self.threats: List[Tuple[array, int]] = [
+            (field, room) for field, room, can_tackle in fields if can_tackle and room > 0
+        ]
+        # Diamond id -> steps of the nearest opponent heading for it
+        self.targets: Dict[int, int] = {}
+        width = self.width
+        for field, room, _ in fields:
+            nearest, target = UNREACHABLE, None
+            for diamond in board.diamonds:
+                if diamond.properties.points <= room:
+                    steps = field[diamond.position.y * width + diamond.position.x]
+                    if steps < nearest:
+                        nearest, target = steps, diamond
+            if target is not None and nearest < self.targets.get(target.id, UNREACHABLE):
+                self.targets[target.id] = nearest
+
+    def opponent_steps(self, x: int, y: int, points: int = 1) -> int:
+        """Steps of the nearest opponent with room for `points`, UNREACHABLE if none has."""
+        field = self.red if points >= 2 else self.blue
+        if field is None:
+            return UNREACHABLE
+        return field[y * self.width + x]
+
+    def _steps(self, diamond, steps: Optional[int]) -> int:
+        if steps is None:
+            position = diamond.position
+            return self.ours[position.y * self.width + position.x]
+        return steps
+
+    def contested(self, diamond, steps: Optional[int] = None) -> bool:
+        """
+        Whether an opponent can reach `diamond` before the bot does, when the
+        bot gets there in `steps` (its distance by default).
+        """
+        position = diamond.position
+        return self.opponent_steps(
+            position.x, position.y, diamond.properties.points
+        ) < self._steps(diamond, steps)
+
+    def lost(self, diamond, steps: Optional[int] = None) -> bool:
+        """Whether an opponent heading for `diamond` gets there before the bot, see contested."""
+        return self.targets.get(diamond.id, UNREACHABLE) < self._steps(diamond, steps)
+
+    def tackle_risk(self, x: int, y: int, carrying: int) -> int:
+        """Diamonds the bot may lose to a tackle right after moving to (x, y) with `carrying`."""
+        cell = y * self.width + x
+        risk = 0
+        for field, room in self.threats:
+            if field[cell] <= 1:
+                risk = max(risk, min(carrying, room))
+        return risk
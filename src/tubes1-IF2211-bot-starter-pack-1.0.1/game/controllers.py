@@ -0,0 +1,13 @@
+from game.logic.astarbot import AStarBot
+from game.logic.greedy12 import greedy12
+from game.logic.greedyredwork import greedyred
+from game.logic.original10 import original
+from game.logic.random import RandomLogic
+
+CONTROLLERS = {
+    "Random": RandomLogic,
+    "mybot": AStarBot,
+    "greedy12": greedy12,
+    "greedyred": greedyred,
+    "original": original,
+}
@@ -0,0 +1,440 @@
+"""
+Columnar corpus of recorded board snapshots, read through mmap.
+
+A corpus is built once from recordings (see game.recording) and holds every
+tick as fixed-width int32 columns, the same ones as BoardColumns plus one
+column of extras, followed by a small table of the bots and the rows that
+differ from the tick before. Reading a tick only slices the mapped file: the
+columns are memoryviews into the page cache, no bytes are copied and nothing
+is decoded until a Board is asked for, and then only the rows that differ
+become new GameObjects. Several processes reading the same corpus share
+those pages.
+
+Layout, all little endian:
+
+    MAGIC
+    tick*           _TICK header, then the object columns (OBJECT_COLUMNS,
+                    `objects` int32 each), `bots` rows of BOT_FIELDS int32,
+                    the `removed` rows of the previous tick and the `changed`
+                    rows of this one (int32 each)
+    offsets         int64 file offset of every tick
+    metadata        JSON: strings, sessions (with their first tick and tick
+                    count), skipped objects
+    _FOOTER MAGIC   tick count, offset of the offsets, offset of the metadata
+
+`extras` holds the bot row of a bot, the string of a teleporter's pair id or
+of a base's name (-1 for None), and MISSING for objects without properties.
+Strings are numbers into the metadata's string table, other fields that were
+None are MISSING. Objects of types outside OBJECT_TYPE_CODES are not kept.
+
+A tick is the previous tick of its session without the removed rows, with
+the changed rows replaced and the new objects appended at the end, which is
+how the game engine orders game_objects. When the objects are not in that
+order, or for the first tick of a session, `removed` is -1 and the tick has
+to be read in full.
+"""
+import json
+import mmap
+import struct
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from game.board_state import BoardStateStore
+from game.model_decoder import from_dict
+from game.models import (
+    OBJECT_TYPE_CODES,
+    Base,
+    Board,
+    BoardColumns,
+    GameObject,
+    Position,
+    Properties,
+)
+
+MAGIC = b"DIAMCRP1"
+
+# session, board id, width, height, minimum delay, move, objects, bots,
+# removed, changed
+_TICK = struct.Struct("<10i")
+# ticks, offset of the tick offsets, offset of the metadata
+_FOOTER = struct.Struct("<3q")
+
+OBJECT_COLUMNS = ("ids", "xs", "ys", "type_codes", "points", "extras")
+BOT_FIELDS = (
+    "score",
+    "milliseconds_left",
+    "base_x",
+    "base_y",
+    "name",
+    "inventory_size",
+    "can_tackle",
+    "time_joined",
+)
+MOVES = (None, "NORTH", "SOUTH", "EAST", "WEST")
+MISSING = -(2**31)
+
+_TYPE_NAMES = {code: name for name, code in OBJECT_TYPE_CODES.items()}
+_BOT = OBJECT_TYPE_CODES["BotGameObject"]
+_BASE = OBJECT_TYPE_CODES["BaseGameObject"]
+_DIAMOND = OBJECT_TYPE_CODES["DiamondGameObject"]
+_TELEPORTER = OBJECT_TYPE_CODES["TeleportGameObject"]
+
+
+def _int(value) -> int:
+    return MISSING if value is None else int(value)
+
+
+def _value(value: int):
+    return None if value == MISSING else value
+
+
+class CorpusWriter:
+    """Appends the snapshots of recorded sessions to a new corpus file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.offsets = array("q")
+        self.strings: Dict[str, int] = {}
+        self.sessions: List[dict] = []
+        self.skipped = 0
+        self._previous_ids: List[int] = []
+        self._previous_objects: Dict[int, dict] = {}
+
+    def _string(self, value: Optional[str], none: int = MISSING) -> int:
+        if value is None:
+            return none
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index
+
+    def start(self, session: dict, features: list) -> int:
+        """Start a session with its first snapshot's (snake case) features."""
+        self.sessions.append(dict(session, features=features, first=len(self.offsets)))
+        self._previous_ids = []
+        self._previous_objects = {}
+        return len(self.sessions) - 1
+
+    def _diff(self, objects: List[dict]) -> Tuple[Optional[array], array]:
+        """Removed rows of the previous tick and changed rows of this one."""
+        previous = self._previous_objects
+        changed = array("i", (row for row, raw in enumerate(objects) if previous.get(raw["id"]) != raw))
+        if not previous:
+            return None, changed
+        ids = {raw["id"] for raw in objects}
+        removed = array("i", (row for row, i in enumerate(self._previous_ids) if i not in ids))
+        expected = [i for i in self._previous_ids if i in ids]
+        expected += [raw["id"] for raw in objects if raw["id"] not in previous]
+        if expected != [raw["id"] for raw in objects]:
+            return None, changed
+        return removed, changed
+
+    def add(self, data: dict, move: Optional[str] = None):
+        """Append a snake case board dict to the current session."""
+        columns = {name: array("i") for name in OBJECT_COLUMNS}
+        bots = array("i")
+        objects = []
+        for raw in data.get("game_objects") or []:
+            code = OBJECT_TYPE_CODES.get(raw["type"])
+            if code is None:
+                self.skipped += 1
+                continue
+            objects.append(raw)
+            props = raw.get("properties")
+            points = 0
+            extra = MISSING
+            if props is not None:
+                extra = 0
+                if code == _BOT:
+                    points = props.get("diamonds") or 0
+                    extra = len(bots) // len(BOT_FIELDS)
+                    base = props.get("base") or {}
+                    bots.extend(
+                        (
+                            _int(props.get("score")),
+                            _int(props.get("milliseconds_left")),
+                            _int(base.get("x")),
+                            _int(base.get("y")),
+                            self._string(props.get("name")),
+                            _int(props.get("inventory_size")),
+                            _int(props.get("can_tackle")),
+                            self._string(props.get("time_joined")),
+                        )
+                    )
+                elif code == _DIAMOND:
+                    points = props.get("points") or 0
+                elif code == _TELEPORTER:
+                    extra = self._string(props.get("pair_id"), -1)
+                elif code == _BASE:
+                    extra = self._string(props.get("name"), -1)
+            columns["ids"].append(raw["id"])
+            columns["xs"].append(raw["position"]["x"])
+            columns["ys"].append(raw["position"]["y"])
+            columns["type_codes"].append(code)
+            columns["points"].append(points)
+            columns["extras"].append(extra)
+        removed, changed = self._diff(objects)
+        self._previous_ids = [raw["id"] for raw in objects]
+        self._previous_objects = {raw["id"]: raw for raw in objects}
+
+        self.offsets.append(self.file.tell())
+        self.file.write(
+            _TICK.pack(
+                len(self.sessions) - 1,
+                data["id"],
+                data["width"],
+                data["height"],
+                data["minimum_delay_between_moves"],
+                MOVES.index(move),
+                len(columns["ids"]),
+                len(bots) // len(BOT_FIELDS),
+                -1 if removed is None else len(removed),
+                len(changed),
+            )
+        )
+        for name in OBJECT_COLUMNS:
+            self.file.write(columns[name].tobytes())
+        self.file.write(bots.tobytes())
+        if removed is not None:
+            self.file.write(removed.tobytes())
+        self.file.write(changed.tobytes())
+
+    def close(self):
+        ends = [s["first"] for s in self.sessions[1:]] + [len(self.offsets)]
+        for session, end in zip(self.sessions, ends):
+            session["ticks"] = end - session["first"]
+        index_offset = self.file.tell()
+        self.file.write(self.offsets.tobytes())
+        metadata_offset = self.file.tell()
+        self.file.write(
+            json.dumps(
+                {
+                    "strings": list(self.strings),
+                    "sessions": self.sessions,
+                    "skipped": self.skipped,
+                }
+            ).encode()
+        )
+        self.file.write(_FOOTER.pack(len(self.offsets), index_offset, metadata_offset))
+        self.file.write(MAGIC)
+        self.file.close()
+
+
+@dataclass(slots=True)
+class TickView:
+    """One tick of a corpus, every array a view into the mapped file."""
+
+    session: int
+    board_id: int
+    width: int
+    height: int
+    minimum_delay_between_moves: int
+    move: Optional[str]
+    columns: BoardColumns
+    extras: memoryview
+    bots: memoryview
+    # Rows removed from the previous tick, None if the tick has to be read in full
+    removed: Optional[memoryview]
+    changed: memoryview
+
+    def __len__(self) -> int:
+        return len(self.extras)
+
+
+class Corpus:
+    """Memory-mapped reader of a corpus file, see the module docstring."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._map)
+        footer = len(self._map) - len(MAGIC) - _FOOTER.size
+        if self._map[: len(MAGIC)] != MAGIC or self._map[-len(MAGIC) :] != MAGIC:
+            self.close()
+            raise ValueError("Not a complete corpus file: {}".format(path))
+        ticks, index_offset, metadata_offset = _FOOTER.unpack_from(self._map, footer)
+        self.offsets = self._buffer[index_offset : index_offset + 8 * ticks].cast("q")
+        metadata = json.loads(bytes(self._buffer[metadata_offset:footer]))
+        self.strings: List[str] = metadata["strings"]
+        self.sessions: List[dict] = metadata["sessions"]
+        self.skipped: int = metadata["skipped"]
+
+    def __enter__(self) -> "Corpus":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def tick(self, index: int) -> TickView:
+        offset = self.offsets[index]
+        (
+            session,
+            board_id,
+            width,
+            height,
+            delay,
+            move,
+            objects,
+            bots,
+            removed,
+            changed,
+        ) = _TICK.unpack_from(self._map, offset)
+        offset += _TICK.size
+        views = []
+        for count in (objects,) * len(OBJECT_COLUMNS) + (
+            bots * len(BOT_FIELDS),
+            max(removed, 0),
+            changed,
+        ):
+            views.append(self._buffer[offset : offset + 4 * count].cast("i"))
+            offset += 4 * count
+        columns, (extras, bot_table, removed_rows, changed_rows) = views[:5], views[5:]
+        return TickView(
+            session,
+            board_id,
+            width,
+            height,
+            delay,
+            MOVES[move],
+            BoardColumns(*columns),
+            extras,
+            bot_table,
+            None if removed < 0 else removed_rows,
+            changed_rows,
+        )
+
+    def ticks(self, session: Optional[int] = None) -> Iterator[TickView]:
+        """Every tick in order, or only those of one session."""
+        indexes = range(len(self.offsets))
+        if session is not None:
+            first = self.sessions[session]["first"]
+            indexes = range(first, first + self.sessions[session]["ticks"])
+        for index in indexes:
+            yield self.tick(index)
+
+    def close(self):
+        # The map can only be closed once no view into it is left
+        if getattr(self, "offsets", None) is not None:
+            self.offsets.release()
+        self._buffer.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # Ticks or boards still hold views, the map is closed with the last one
+            pass
+        self._file.close()
+
+
+class BoardBuilder:
+    """
+    Turns the ticks of one session into Boards for next_move. Objects in
+    rows that did not change since the previous tick are the same
+    GameObjects, and the BoardStateStore is handed the changes instead of
+    comparing every object, so a tick costs about as much as the number of
+    objects that changed. The board's columns are the tick's views, keep a
+    board no longer than its corpus is open.
+    """
+
+    def __init__(self, corpus: Corpus, session: int):
+        self.corpus = corpus
+        features = corpus.sessions[session].get("features") or []
+        self.features = from_dict(
+            Board,
+            {
+                "id": 0,
+                "width": 0,
+                "height": 0,
+                "features": features,
+                "minimum_delay_between_moves": 0,
+                "game_objects": [],
+            },
+        ).features
+        self.store = BoardStateStore()
+        self._game_objects: Optional[List[GameObject]] = None
+
+    def _bot_properties(self, tick: TickView, row: int, diamonds: int) -> Properties:
+        size = len(BOT_FIELDS)
+        score, left, base_x, base_y, name, inventory, can_tackle, joined = tick.bots[
+            row * size : (row + 1) * size
+        ]
+        strings = self.corpus.strings
+        return Properties(
+            diamonds=diamonds,
+            score=_value(score),
+            name=None if name == MISSING else strings[name],
+            inventory_size=_value(inventory),
+            can_tackle=None if can_tackle == MISSING else bool(can_tackle),
+            milliseconds_left=_value(left),
+            time_joined=None if joined == MISSING else strings[joined],
+            base=None if base_x == MISSING else Base(base_y, base_x),
+        )
+
+    def _object(self, tick: TickView, row: int) -> GameObject:
+        columns = tick.columns
+        code, points, extra = columns.type_codes[row], columns.points[row], tick.extras[row]
+        properties = None
+        if extra != MISSING:
+            if code == _BOT:
+                properties = self._bot_properties(tick, extra, points)
+            elif code == _DIAMOND:
+                properties = Properties(points=points or None)
+            elif code == _TELEPORTER:
+                properties = Properties(
+                    pair_id=self.corpus.strings[extra] if extra >= 0 else None
+                )
+            elif code == _BASE:
+                properties = Properties(
+                    name=self.corpus.strings[extra] if extra >= 0 else None
+                )
+            else:
+                properties = Properties()
+        return GameObject(
+            columns.ids[row],
+            Position(columns.ys[row], columns.xs[row]),
+            _TYPE_NAMES[code],
+            properties,
+        )
+
+    def build(self, tick: TickView) -> Board:
+        previous = self._game_objects
+        if tick.removed is None or previous is None:
+            game_objects = [self._object(tick, row) for row in range(len(tick))]
+            board = self._board(tick, game_objects)
+            self.store.update(board)
+        else:
+            game_objects = list(previous)
+            removed = []
+            for row in reversed(tick.removed):
+                removed.append(game_objects.pop(row))
+            kept = len(game_objects)
+            added, replaced = [], []
+            for row in tick.changed:
+                obj = self._object(tick, row)
+                if row < kept:
+                    replaced.append((game_objects[row], obj))
+                    game_objects[row] = obj
+                else:
+                    added.append(obj)
+                    game_objects.append(obj)
+            board = self._board(tick, game_objects)
+            self.store.apply(board, added, removed, replaced)
+        self._game_objects = game_objects
+        board._columns = tick.columns
+        return board
+
+    def _board(self, tick: TickView, game_objects: List[GameObject]) -> Board:
+        return Board(
+            tick.board_id,
+            tick.width,
+            tick.height,
+            self.features,
+            tick.minimum_delay_between_moves,
+            game_objects,
+        )
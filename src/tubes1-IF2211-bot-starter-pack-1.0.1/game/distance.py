@@ -0,0 +1,162 @@
+from array import array
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# Kept between snapshots: the exit columns of recent teleporter layouts, and
+# the fields of recent sources such as bases and the cells bots walk over again
+EXIT_FIELD_CACHE_SIZE = 16
+SOURCE_FIELD_CACHE_SIZE = 256
+
+
+def _grid_columns(width: int, x: int) -> List[int]:
+    return [abs(cx - x) for cx in range(width)]
+
+
+@lru_cache(maxsize=EXIT_FIELD_CACHE_SIZE)
+def _exit_columns(width: int, exits: Tuple[Tuple[int, int], ...]) -> Tuple[List[int], ...]:
+    return tuple(_grid_columns(width, x) for x, _ in exits)
+
+
+@lru_cache(maxsize=SOURCE_FIELD_CACHE_SIZE)
+def _source_field(
+    width: int, height: int, teleporters: Tuple[Tuple[int, int], ...], x: int, y: int
+) -> array:
+    """
+    Steps from (x, y) to every cell, flattened as y * width + x. The board
+    has no walls, so a breadth-first search from (x, y) reaches every cell in
+    its Manhattan distance and each teleporter exit B reaches it in
+    entry(B) + |B - cell|, where entry(B) is the cheapest walk into another
+    teleporter plus the step through it. A teleporter on (x, y) itself is
+    not an entry, the bot stands on it and would have to step off and back
+    on. The field is filled in row by row with the minimum of those.
+    """
+    columns = _grid_columns(width, x)
+    exits = []
+    if len(teleporters) >= 2:
+        entries = [abs(tx - x) + abs(ty - y) + 1 for tx, ty in teleporters]
+        for index, (exit_columns, (_, exit_y)) in enumerate(
+            zip(_exit_columns(width, teleporters), teleporters)
+        ):
+            costs = [
+                cost
+                for other, cost in enumerate(entries)
+                if other != index and teleporters[other] != (x, y)
+            ]
+            if costs:
+                exits.append((min(costs), exit_y, exit_columns))
+    field = array("i")
+    for cy in range(height):
+        dy = abs(cy - y)
+        row = [dx + dy for dx in columns]
+        if exits:
+            rows = [row]
+            for entry, exit_y, exit_columns in exits:
+                offset = entry + abs(cy - exit_y)
+                rows.append([offset + dx for dx in exit_columns])
+            row = map(min, *rows)
+        field.extend(row)
+    return field
+
+
+class DistanceFields:
+    """
+    Distances between cells of one board snapshot, counting a walk into a
+    teleporter and out of another one as the logic modules always have:
+    |source - A| + 1 + |B - target| for every ordered pair of teleporters
+    A != B, or the plain Manhattan distance if that is shorter. A is never
+    the teleporter the source stands on, e.g. the exit a bot just came out
+    of, so a distance from or to a teleporter's cell is not symmetric.
+
+    A field (one distance per cell, in a flat int array) is built the first
+    time a source is asked for, e.g. the bot or its base, and every distance
+    from that source is a single array lookup afterwards. Fields only depend
+    on the board size, the teleporter layout and the source, so recent ones
+    are kept between snapshots.
+    """
+
+    def __init__(self, width: int, height: int, teleporters: List):
+        self.width = width
+        self.height = height
+        self.teleporters = teleporters
+        self._layout = tuple((t.position.x, t.position.y) for t in teleporters)
+        self._fields: Dict[Tuple[int, int], array] = {}
+
+    def field(self, x: int, y: int) -> array:
+        """Distances from (x, y) to every cell, see the class docstring."""
+        source = (x, y)
+        field = self._fields.get(source)
+        if field is None:
+            field = _source_field(self.width, self.height, self._layout, x, y)
+            self._fields[source] = field
+        return field
+
+    def between(self, source, target) -> int:
+        """
+        Distance between two positions. Distances are symmetric away from
+        the teleporters, so an existing field of `target` is used if there
+        is one, otherwise the field of `source` is built. Pass the end that
+        stays the same over many calls (the bot, the base) as `source`.
+        """
+        width = self.width
+        field = self._fields.get((target.x, target.y))
+        if (
+            field is not None
+            and (source.x, source.y) not in self._layout
+            and (target.x, target.y) not in self._layout
+        ):
+            return field[source.y * width + source.x]
+        return self.field(source.x, source.y)[target.y * width + target.x]
+
+    def matrix(self, positions: List) -> List[List[int]]:
+        """
+        Distances between every pair of `positions`, worked out from the
+        walks to each teleporter instead of building a field per position,
+        which is cheaper for a handful of positions on a large board.
+        """
+        pairs = [
+            (index_a, index_b)
+            for index_a in range(len(self.teleporters))
+            for index_b in range(len(self.teleporters))
+            if index_a != index_b
+        ]
+        walks = [
+            [abs(p.x - t.position.x) + abs(p.y - t.position.y) for t in self.teleporters]
+            for p in positions
+        ]
+        rows = []
+        for a, walks_a in zip(positions, walks):
+            row = []
+            for b, walks_b in zip(positions, walks):
+                best = abs(a.x - b.x) + abs(a.y - b.y)
+                for index_a, index_b in pairs:
+                    if not walks_a[index_a]:
+                        # a stands on this teleporter, see the class docstring
+                        continue
+                    dist = walks_a[index_a] + 1 + walks_b[index_b]
+                    if dist < best:
+                        best = dist
+                row.append(best)
+            rows.append(row)
+        return rows
+
+    def entry_teleporter(self, a, b) -> Optional[object]:
+        """
+        The teleporter to walk into on the way from a to b, or None if
+        walking is as short. Ties go to the first pair in the order of
+        board.teleporters, like the loops this replaces.
+        """
+        best = abs(a.x - b.x) + abs(a.y - b.y)
+        entry = None
+        for tp_a in self.teleporters:
+            if tp_a.position.x == a.x and tp_a.position.y == a.y:
+                continue
+            for tp_b in self.teleporters:
+                if tp_a is not tp_b:
+                    dist = (
+                        abs(a.x - tp_a.position.x) + abs(a.y - tp_a.position.y) + 1
+                        + abs(tp_b.position.x - b.x) + abs(tp_b.position.y - b.y)
+                    )
+                    if dist < best:
+                        best = dist
+                        entry = tp_a
+        return entry
@@ -0,0 +1,123 @@
+import json
+import sys
+from array import array
+from bisect import bisect_left
+from time import perf_counter_ns
+from typing import List, Optional, Sequence, Tuple
+
+from game.logic.base import BaseLogic
+from game.models import Board, GameObject
+
+# Upper bounds (inclusive) of the latency histogram buckets in milliseconds,
+# the last bucket takes everything slower
+LATENCY_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250)
+
+
+def percentile(ordered: Sequence[float], fraction: float) -> float:
+    """Nearest rank percentile of an already sorted sequence."""
+    if not ordered:
+        return 0.0
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+class DecisionStats:
+    """
+    Per move measurements of one logic: time spent in next_move, the number
+    of objects on the board it was given, and the change in allocated memory
+    blocks over the call (sys.getallocatedblocks, so it counts blocks still
+    alive when next_move returns, e.g. caches and paths kept on the logic).
+    """
+
+    def __init__(self, logic: str, bot: Optional[str] = None):
+        self.logic = logic
+        self.bot = bot
+        self.latencies_ns = array("q")
+        self.objects = array("l")
+        self.allocated_blocks = array("q")
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(self, latency_ns: int, objects: int, allocated_blocks: int):
+        self.latencies_ns.append(latency_ns)
+        self.objects.append(objects)
+        self.allocated_blocks.append(allocated_blocks)
+        self.histogram[bisect_left(LATENCY_BUCKETS_MS, latency_ns / 1e6)] += 1
+
+    def to_dict(self) -> dict:
+        moves = len(self.latencies_ns)
+        ordered = sorted(self.latencies_ns)
+        latency = {
+            "mean": sum(ordered) / moves / 1e6 if moves else 0.0,
+            "p50": percentile(ordered, 0.50) / 1e6,
+            "p95": percentile(ordered, 0.95) / 1e6,
+            "p99": percentile(ordered, 0.99) / 1e6,
+            "max": ordered[-1] / 1e6 if moves else 0.0,
+        }
+        histogram = [
+            {"le": bound, "count": count}
+            for bound, count in zip(LATENCY_BUCKETS_MS, self.histogram)
+        ]
+        histogram.append({"le": None, "count": self.histogram[-1]})
+        return {
+            "logic": self.logic,
+            "bot": self.bot,
+            "moves": moves,
+            "latency_ms": latency,
+            "latency_histogram_ms": histogram,
+            "objects_per_board": {
+                "mean": sum(self.objects) / moves if moves else 0.0,
+                "max": max(self.objects, default=0),
+            },
+            "allocated_blocks_per_move": {
+                "mean": sum(self.allocated_blocks) / moves if moves else 0.0,
+                "max": max(self.allocated_blocks, default=0),
+                "total": sum(self.allocated_blocks),
+            },
+        }
+
+    def summary(self) -> str:
+        data = self.to_dict()
+        latency = data["latency_ms"]
+        return "{} moves, next_move {:.2f} ms p50 / {:.2f} ms p95 / {:.2f} ms p99 / {:.2f} ms max".format(
+            data["moves"], latency["p50"], latency["p95"], latency["p99"], latency["max"]
+        )
+
+
+class InstrumentedLogic(BaseLogic):
+    """
+    Wraps a logic and records a DecisionStats entry for every next_move call.
+    Attributes not defined here are looked up on the wrapped logic, so the
+    wrapper can stand in for it. Without --stats nothing is wrapped and there
+    is no overhead at all.
+    """
+
+    def __init__(self, logic: BaseLogic, stats: DecisionStats):
+        self.logic = logic
+        self.stats = stats
+
+    def __getattr__(self, name):
+        if name == "logic":
+            # Not set yet, e.g. while being copied
+            raise AttributeError(name)
+        return getattr(self.logic, name)
+
+    def refine(self, until: float) -> bool:
+        return self.logic.refine(until)
+
+    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        blocks = sys.getallocatedblocks()
+        start = perf_counter_ns()
+        try:
+            return self.logic.next_move(board_bot, board)
+        finally:
+            elapsed = perf_counter_ns() - start
+            self.stats.record(
+                elapsed,
+                len(board.game_objects),
+                sys.getallocatedblocks() - blocks,
+            )
+
+
+def write_stats(path: str, stats: List[DecisionStats]):
+    """Export the stats of every bot as {"bots": [...]} to a JSON file."""
+    with open(path, "w") as f:
+        json.dump({"bots": [s.to_dict() for s in stats]}, f, indent=2)
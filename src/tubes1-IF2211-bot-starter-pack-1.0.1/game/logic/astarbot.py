@@ -3,6 +3,7 @@ from typing import Optional, List, Tuple
 
 from game.logic.base import BaseLogic
 from game.models import GameObject, Board, Position
+from game.spatial import DiamondDensity
 from ..util import get_direction
 
 
@@ -58,24 +59,22 @@ class AStarBot(BaseLogic):
             
             if base:
                 nearby_diamonds = [
-                    obj for obj in board.game_objects
-                    if obj.type == "DiamondGameObject" and
-                    abs(obj.position.x - base.x) + abs(obj.position.y - base.y) <= 4
+                    obj for obj in board.diamonds
+                    if abs(obj.position.x - base.x) + abs(obj.position.y - base.y) <= 4
                 ]
 
             # Cari objek pada posisi tujuan dan terapkan weight
-            for obj in board.game_objects:
-                if obj.position.x == pos2.x and obj.position.y == pos2.y:
-                    if obj.type == "DiamondButtonGameObject":
-                        # Red button weight=1, kecuali jika diamond dekat base <= 2 maka weight=4
-                        weight = 4 if len(nearby_diamonds) <= 2 else 1
-                        # Kalkulasikan skor akhir
-                        return min_dist - weight
-                    elif obj.type == "DiamondGameObject":
-                        points = getattr(obj.properties, "points", 1)
-                        # Red diamond weight=2, Blue diamond weight=1
-                        weight = 2 if points == 2 else 1
-                        return min_dist - weight
+            for obj in board.objects_at(pos2.x, pos2.y):
+                if obj.type == "DiamondButtonGameObject":
+                    # Red button weight=1, kecuali jika diamond dekat base <= 2 maka weight=4
+                    weight = 4 if len(nearby_diamonds) <= 2 else 1
+                    # Kalkulasikan skor akhir
+                    return min_dist - weight
+                elif obj.type == "DiamondGameObject":
+                    points = getattr(obj.properties, "points", 1)
+                    # Red diamond weight=2, Blue diamond weight=1
+                    weight = 2 if points == 2 else 1
+                    return min_dist - weight
 
         return min_dist
 
@@ -129,7 +128,7 @@ class AStarBot(BaseLogic):
     def should_return_to_base(self, board_bot: GameObject, board: Board) -> bool:
         steps_to_base = self.heuristic(self.position, board_bot.properties.base)
         time_left = int(board_bot.properties.milliseconds_left / 1000)
-        diamonds = [obj for obj in board.game_objects if obj.type == "DiamondGameObject"]
+        diamonds = board.diamonds
         diamond_nearby = any(self.heuristic(self.position, d.position, board) <= 3 for d in diamonds)
         return (
             board_bot.properties.diamonds >= self.inventory_full_threshold
@@ -159,11 +158,9 @@ class AStarBot(BaseLogic):
         best_cluster_center = None
 
         # Cari cluster center dengan density tertinggi (pakai heuristic sebagai jarak)
+        density = DiamondDensity.for_diamonds(board, diamonds)
         for diamond in diamonds:
-            count = sum(
-                self.heuristic(diamond.position, other.position, board) <= cluster_radius
-                for other in diamonds
-            )
+            count = sum(density.manhattan(diamond.position.x, diamond.position.y, cluster_radius))
             if count > max_cluster_count or (
                 count == max_cluster_count and (
                     self.heuristic(self.position, diamond.position, board) <
@@ -1,9 +1,64 @@
 from abc import ABC
-from typing import Tuple
+from time import perf_counter
+from typing import Iterator, Optional, Tuple
 
 from game.models import Board, GameObject
 
+# Share of the board's minimum delay between moves that an AnytimeLogic may
+# spend on one next_move call
+BUDGET_FRACTION = 0.2
+
 
 class BaseLogic(ABC):
     def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
         raise NotImplementedError()
+
+    def refine(self, until: float) -> bool:
+        """
+        Use the time until perf_counter() reaches `until` (the next move's
+        deadline) to prepare for the next tick. Returns whether work is left.
+        """
+        return False
+
+
+class AnytimeLogic(BaseLogic):
+    """
+    A logic that always answers within a budget of `budget_fraction` of the
+    board's minimum delay between moves.
+
+    Subclasses implement `plan`, a generator that yields a move whenever it
+    found a better one and None at checkpoints of longer searches. next_move
+    runs it until it finishes or the budget is spent and answers with the last
+    move yielded, or `fallback_move` if there was none. Work cut short can be
+    continued in `refine`, which the game loop calls while it waits for the
+    rate limit.
+    """
+
+    budget_fraction: float = BUDGET_FRACTION
+    # next_move calls that ran out of budget
+    budget_exceeded: int = 0
+
+    def plan(self, board_bot: GameObject, board: Board) -> Iterator[Optional[Tuple[int, int]]]:
+        raise NotImplementedError()
+
+    def fallback_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        return (1, 0) if board_bot.position.x + 1 < board.width else (-1, 0)
+
+    def budget(self, board: Board) -> float:
+        """Seconds next_move may take on this board."""
+        return board.minimum_delay_between_moves / 1000 * self.budget_fraction
+
+    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        deadline = perf_counter() + self.budget(board)
+        move = None
+        plan = self.plan(board_bot, board)
+        for step in plan:
+            if step is not None:
+                move = step
+            if perf_counter() >= deadline:
+                plan.close()
+                self.budget_exceeded += 1
+                break
+        if move is None:
+            return self.fallback_move(board_bot, board)
+        return move
@@ -2,9 +2,19 @@ import random
 from typing import Optional, List, Tuple
 
 from game.logic.base import BaseLogic
+from game.logic.routing import RoutePlanner
 from game.models import GameObject, Board, Position
+from game.tackling import TackleOpportunity, TackleTracker
 from ..util import get_direction
 
+try:
+    from game.logic.greedy12_numpy import score_targets
+except ImportError:  # NumPy is optional, targets are then scored one by one
+    score_targets = None
+
+# Below this many candidate diamonds scoring them one by one is faster
+NUMPY_MIN_CANDIDATES = 50
+
 
 class greedy12(BaseLogic):
     def __init__(self):
@@ -13,6 +23,13 @@ class greedy12(BaseLogic):
         self.inv_full: int = 5
         self.cluster_radius: int = 2
         self.base_time_penalty: float = 0.5 
+        self.use_numpy: bool = score_targets is not None
+        self.base: Optional[Position] = None
+        # Plans whole trips, None to pick one diamond at a time
+        self.route_planner: Optional[RoutePlanner] = RoutePlanner()
+        self.tackles = TackleTracker()
+        # Tackle hanya kalau dapat paling sedikit segini diamond
+        self.tackle_min_gain: int = 1
 
     def get_weight(self, obj: GameObject, board: Board, ignore_red=False) -> int:
         if obj.type == "DiamondGameObject":
@@ -21,13 +38,11 @@ class greedy12(BaseLogic):
                 return 0
             return 2 if points == 2 else 1
         elif obj.type == "DiamondButtonGameObject":
-            base = next((bot.properties.base for bot in board.bots 
-                        if hasattr(bot.properties, "base")), None)
+            base = self.base
             if base:
                 nearby = [
-                    o for o in board.game_objects
-                    if o.type == "DiamondGameObject" and
-                    abs(o.position.x - base.x) + abs(o.position.y - base.y) <= 4
+                    o for o in board.diamonds
+                    if abs(o.position.x - base.x) + abs(o.position.y - base.y) <= 4
                 ]
                 total_weight = sum(self.get_weight(o, board) for o in nearby)
                 return 3 if total_weight <= 2 else 0
@@ -36,43 +51,26 @@ class greedy12(BaseLogic):
 
     def get_cluster_value(self, pos: Position, board: Board, ignore_red: bool) -> float:
         # Menghitung nilai cluster berdasarkan total poin diamond di sekitar
-        cluster = [
-            o for o in board.game_objects
-            if o.type == "DiamondGameObject" and
-            abs(o.position.x - pos.x) <= self.cluster_radius and 
-            abs(o.position.y - pos.y) <= self.cluster_radius
-        ]
-        return sum(self.get_weight(o, board, ignore_red) for o in cluster)
+        blue, red = board.density.square(pos.x, pos.y, self.cluster_radius)
+        return blue + (0 if ignore_red else 2 * red)
 
     def get_best_path(self, pos1: Position, pos2: Position, board: Board) -> tuple[int, Optional[GameObject]]:
-        #distance antar posisi bot dan diamond
-        base_dist = abs(pos1.x - pos2.x) + abs(pos1.y - pos2.y)
-        min_dist = base_dist
+        #distance antar posisi bot dan diamond, lewat teleporter kalau lebih dekat
+        min_dist = board.distances.between(pos1, pos2)
         best_teleporter = None
-
-        teleporters = [o for o in board.game_objects if o.type == "TeleportGameObject"]
-        for tp_a in teleporters:
-            for tp_b in teleporters:
-                if tp_a is not tp_b:
-                    dist = (
-                        abs(pos1.x - tp_a.position.x) + abs(pos1.y - tp_a.position.y) + 1 +
-                        abs(tp_b.position.x - pos2.x) + abs(tp_b.position.y - pos2.y)
-                    )
-                    if dist < min_dist:
-                        min_dist = dist
-                        best_teleporter = tp_a
+        if min_dist < abs(pos1.x - pos2.x) + abs(pos1.y - pos2.y):
+            best_teleporter = board.distances.entry_teleporter(pos1, pos2)
 
         return min_dist, best_teleporter
 
     def heuristic(self, pos1: Position, pos2: Position, board: Board, ignore_red=False, time_left=None) -> float:
         # jarak terbaik antara posisi bot dan diamond
-        min_dist, _ = self.get_best_path(pos1, pos2, board)
+        min_dist = board.distances.between(pos1, pos2)
         
         # Hitung weight objek pada posisi tujuan
         weight = 0
-        for obj in board.game_objects:
-            if obj.position.x == pos2.x and obj.position.y == pos2.y:
-                weight = self.get_weight(obj, board, ignore_red)
+        for obj in board.objects_at(pos2.x, pos2.y):
+            weight = self.get_weight(obj, board, ignore_red)
 
         # total weight cluster diamond
         cluster_value = self.get_cluster_value(pos2, board, ignore_red)
@@ -85,6 +83,15 @@ class greedy12(BaseLogic):
 
         return min_dist - weight + time_penalty
 
+    def select_target(self, diamonds: List[GameObject], board: Board, ignore_red=False, time_left=None) -> GameObject:
+        # diamond dengan heuristic terkecil, yang pertama kalau ada yang sama
+        if self.use_numpy and len(diamonds) >= NUMPY_MIN_CANDIDATES:
+            scores = score_targets(self, board, diamonds, self.position, ignore_red, time_left)
+            return diamonds[int(scores.argmin())]
+        return min(diamonds, 
+                   key=lambda d: self.heuristic(self.position, d.position, 
+                                              board, ignore_red, time_left))
+
     #logika bot untuk kembali ke base
     def gobaselogic(self, bot: GameObject, board: Board, nearest_diamond_dist: int) -> bool:
         base = bot.properties.base
@@ -98,12 +105,32 @@ class greedy12(BaseLogic):
 
     def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
         self.position = board_bot.position
-        base = board_bot.properties.base
+        base = self.base = board_bot.properties.base
         inventory = board_bot.properties.diamonds
         time_left = board_bot.properties.milliseconds_left
 
+        # Tackle lawan yang bawa diamond kalau dia (akan) ada di sebelah
+        self.tackles.update(board)
+        for chance in self.tackles.opportunities(board_bot):
+            if chance.gain < self.tackle_min_gain:
+                break
+            if self.tackle_is_safe(chance, board_bot, board):
+                x, y = chance.cell
+                return (x - self.position.x, y - self.position.y)
+
+        # Ikuti rute beberapa diamond sekaligus kalau ada yang layak
+        if self.route_planner is not None:
+            try:
+                stop = self.route_planner.next_stop(board_bot, board)
+            except LookupError:
+                pass
+            else:
+                target = stop.position if stop else base
+                move = self.move_via_teleporter(target, board)
+                return self.avoid_tackles(move, target, board_bot, board)
+
         # Filter diamond
-        diamonds = [o for o in board.game_objects if o.type == "DiamondGameObject"]
+        diamonds = board.diamonds
         ignore_red = inventory >= 4
         if ignore_red:
             diamonds = [d for d in diamonds if getattr(d.properties, "points", 1) == 1]
@@ -112,9 +139,7 @@ class greedy12(BaseLogic):
             return self.move_towards(base)
 
         # Pilih target dengan heuristic yang sudah memperhitungkan waktu
-        nearest = min(diamonds, 
-                     key=lambda d: self.heuristic(self.position, d.position, 
-                                                board, ignore_red, time_left))
+        nearest = self.select_target(diamonds, board, ignore_red, time_left)
         nearest_dist, best_teleporter = self.get_best_path(self.position, nearest.position, board)
 
         # Cek apakah perlu kembali ke base
@@ -128,6 +153,52 @@ class greedy12(BaseLogic):
         # Bergerak ke diamond terdekat
         return self.move_towards(nearest.position)
 
+    def move_via_teleporter(self, target: Position, board: Board) -> Tuple[int, int]:
+        _, best_teleporter = self.get_best_path(self.position, target, board)
+        # Teleporter tempat bot berdiri tidak bisa dimasuki lagi dengan diam di situ
+        if best_teleporter and best_teleporter.position != self.position:
+            return self.move_towards(best_teleporter.position)
+        return self.move_towards(target)
+
+    def tackle_risk(self, board_bot: GameObject, board: Board, x: int, y: int) -> int:
+        # Diamond yang bisa hilang kalau melangkah ke (x, y)
+        return max(
+            board.contention(board_bot).tackle_risk(x, y, board_bot.properties.diamonds),
+            self.tackles.threat(board_bot, x, y),
+        )
+
+    def tackle_is_safe(self, chance: TackleOpportunity, board_bot: GameObject, board: Board) -> bool:
+        # Lawan yang diam atau tidak bisa balas tackle aman dikejar. Lawan yang
+        # bergerak bisa masuk duluan ke sel itu dan mengambil diamond kita
+        victim = chance.victim.properties
+        if (chance.victim.position.x, chance.victim.position.y) == chance.cell:
+            return True
+        if not victim.can_tackle or victim.inventory_size - victim.diamonds <= 0:
+            return True
+        if not board_bot.properties.diamonds:
+            return True
+        x, y = chance.cell
+        return self.tackle_risk(board_bot, board, x, y) < chance.gain
+
+    def avoid_tackles(self, move: Tuple[int, int], target: Position, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        # Kalau langkah ini bisa kena tackle lawan, ambil langkah lain yang juga mendekat ke target
+        carrying = board_bot.properties.diamonds
+        x, y = self.position.x, self.position.y
+        if not carrying or not self.tackle_risk(board_bot, board, x + move[0], y + move[1]):
+            return move
+        field = board.distances.field(target.x, target.y)
+        width = board.width
+        for dx, dy in self.directions:
+            nx, ny = x + dx, y + dy
+            if (
+                0 <= nx < width
+                and 0 <= ny < board.height
+                and field[ny * width + nx] < field[y * width + x]
+                and not self.tackle_risk(board_bot, board, nx, ny)
+            ):
+                return (dx, dy)
+        return move
+
     def move_towards(self, target: Position) -> Tuple[int, int]:
         #bergerak ke arah target
         dx = target.x - self.position.x
@@ -53,37 +53,27 @@ class greedyred(BaseLogic):
             if base is not None:
                 # Hitung diamond dalam radius 4 dari base
                 nearby_diamonds = [
-                    obj for obj in board.game_objects
-                    if obj.type == "DiamondGameObject" and
-                    abs(obj.position.x - base.x) + abs(obj.position.y - base.y) <= 4
+                    obj for obj in board.diamonds
+                    if abs(obj.position.x - base.x) + abs(obj.position.y - base.y) <= 4
                 ]
                 if len(nearby_diamonds) <= 2:  # Changed from <= 2 to <= 2
                     red_button_weight = 4
 
-            # Cari semua teleporter
-            teleporters = [obj for obj in board.game_objects if obj.type == "TeleportGameObject"]
-            for tp_a in teleporters:
-                for tp_b in teleporters:
-                    if tp_a is not tp_b:
-                        dist = (
-                            abs(pos1.x - tp_a.position.x) + abs(pos1.y - tp_a.position.y) + 1 +
-                            abs(tp_b.position.x - pos2.x) + abs(tp_b.position.y - pos2.y)
-                        )
-                        if dist < min_dist:
-                            min_dist = dist
+            # Jarak lewat teleporter dari distance field, pos2 (biasanya base)
+            # sebagai sumber karena sama untuk semua kandidat
+            min_dist = board.distances.between(pos2, pos1)
 
         # Weight objek pada posisi tujuan
-        for obj in board.game_objects:
-            if obj.position.x == pos2.x and obj.position.y == pos2.y:
-                if obj.type == "DiamondButtonGameObject":
-                    weight = red_button_weight  # Use weight=4 only if nearby diamonds <= 2
-                elif obj.type == "DiamondGameObject":
-                    points = getattr(obj.properties, "points", 1)
-                    if points == 2:  # Red diamond
-                        weight = 2
-                    else:  # Blue diamond
-                        weight = 1
-                    return min_dist - weight
+        for obj in board.objects_at(pos2.x, pos2.y):
+            if obj.type == "DiamondButtonGameObject":
+                weight = red_button_weight  # Use weight=4 only if nearby diamonds <= 2
+            elif obj.type == "DiamondGameObject":
+                points = getattr(obj.properties, "points", 1)
+                if points == 2:  # Red diamond
+                    weight = 2
+                else:  # Blue diamond
+                    weight = 1
+                return min_dist - weight
 
         return min_dist
 
@@ -104,9 +94,8 @@ class greedyred(BaseLogic):
                 return (1, 0)
 
         # Filter game objects berdasarkan tipe
-        game_objects = board.game_objects
-        red_buttons = [d for d in game_objects if d.type == "DiamondButtonGameObject"]
-        diamonds = [d for d in game_objects if d.type == "DiamondGameObject"]
+        red_buttons = board.diamond_buttons
+        diamonds = board.diamonds
         blue_diamonds = [d for d in diamonds if getattr(d.properties, "points", 1) == 1]
         red_diamonds = [d for d in diamonds if getattr(d.properties, "points", 1) == 2]
 
@@ -147,7 +136,7 @@ class greedyred(BaseLogic):
     def should_return_to_base(self, board_bot: GameObject, board: Board) -> bool:
         steps_to_base = self.heuristic(self.position, board_bot.properties.base)
         time_left = int(board_bot.properties.milliseconds_left / 1000)
-        diamonds = [obj for obj in board.game_objects if obj.type == "DiamondGameObject"]
+        diamonds = board.diamonds
         diamond_nearby = any(self.heuristic(self.position, d.position, board) <= 3 for d in diamonds)
         return (
             board_bot.properties.diamonds >= self.inventory_full_threshold
@@ -1,21 +1,47 @@
 import random
-from typing import Optional, List, Tuple
+from heapq import heappop, heappush
+from time import perf_counter
+from typing import Generator, Iterator, Optional, List, Tuple
 
-from game.logic.base import BaseLogic
+from game.logic.base import AnytimeLogic
 from game.models import GameObject, Board, Position
+from game.spatial import DiamondDensity, cells_within
 from ..util import get_direction
 
+# Cells A* expands between two checks of the time budget
+SEARCH_CHECKPOINT = 64
 
-class original(BaseLogic):  
+
+def _run(steps: Generator) -> bool:
+    """Run a search generator to the end and return its result."""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as done:
+            return done.value
+
+
+class original(AnytimeLogic):  
     def __init__(self):
         super().__init__()
         self.directions = [(1, 0), (0, 1), (-1, 0), (0, -1)]  # East, South, West, North
         self.goal_position: Optional[Position] = None
         self.path: List[Position] = []
-        self.visited: set[Position] = set()
+        self.teleport_links: dict = {}
+        self.teleport_links_layout: Optional[tuple] = None
         self.max_path_length: int = 200
         self.path_index: int = 0
         self.inventory_full_threshold: int = 5
+        # (goal, teleporter layout) that self.path was planned for
+        self.path_key: Optional[tuple] = None
+        self.path_cache_hits: int = 0
+        self.path_cache_misses: int = 0
+        # (path key, A* generator) of a search the time budget cut short
+        self.pending_search: Optional[tuple] = None
+
+    def __getstate__(self):
+        # Generators cannot be copied, a copy starts without the pending search
+        return dict(self.__dict__, pending_search=None)
 
     def heuristic(self, pos1: Position, pos2: Position) -> int:
         """Estimates the Manhattan distance between two positions.
@@ -29,7 +55,7 @@ class original(BaseLogic):
             new_pos = Position(x=position.x + dx, y=position.y + dy)
             if self.is_valid_position(board, position, new_pos):
                 neighbors.append(new_pos)
-        teleporters = [obj for obj in board.game_objects if obj.type == "TeleportGameObject"]
+        teleporters = board.teleporters
         for tele in teleporters:
             if position.x == tele.position.x and position.y == tele.position.y:
                 for other in teleporters:
@@ -40,47 +66,185 @@ class original(BaseLogic):
     def is_valid_position(self, board: Board, current_pos: Position, next_pos: Position) -> bool:
         return 0 <= next_pos.x < board.width and 0 <= next_pos.y < board.height
 
+    def get_teleporter_layout(self, board: Board) -> tuple:
+        return tuple((t.position.x, t.position.y) for t in board.teleporters)
+
+    def get_teleport_links(self, board: Board) -> dict:
+        """
+        Cell id (y * width + x) of each teleporter -> cell ids of the other
+        teleporters, the extra neighbours of that cell. Rebuilt only when the
+        teleporters moved.
+        """
+        layout = self.get_teleporter_layout(board)
+        if self.teleport_links_layout != layout:
+            width = board.width
+            teleporters = board.teleporters
+            links = {}
+            for tele in teleporters:
+                cell = tele.position.y * width + tele.position.x
+                for other in teleporters:
+                    if tele.position != other.position:
+                        links.setdefault(cell, []).append(other.position.y * width + other.position.x)
+            self.teleport_links = links
+            self.teleport_links_layout = layout
+        return self.teleport_links
+
     def find_path_a_star(self, board: Board, start: Position, goal: Position, avoid: List[Position] = None) -> bool:
         """
         Finds the shortest path using A* search.
         (M 14 - Route Planning Bag1 .pdf, M 15 - Route Planning Bag2.pdf)
         """
+        return _run(self.search_a_star(board, start, goal, avoid))
+
+    def search_a_star(
+        self, board: Board, start: Position, goal: Position, avoid: List[Position] = None
+    ) -> Generator[None, None, bool]:
+        """
+        find_path_a_star as a generator that yields every SEARCH_CHECKPOINT
+        expanded cells, so it can be stopped and resumed, and returns whether
+        self.path was found.
 
-        self.path.clear()
+        Cells are integer ids (y * width + x) and the frontier is a binary heap.
+        Equal priorities are expanded in insertion order and a cell is closed
+        when it is first pushed, so the path found is the same as with the
+        sorted-list frontier this replaced. Cells in `avoid` (other than the
+        goal) are closed from the start, and cells further than
+        max_path_length steps are not expanded.
+        """
+
+        self.path = []
         self.path_index = 0
-        self.visited.clear()
-        start_key, goal_key = (start.x, start.y), (goal.x, goal.y)
-        frontier = [(0, start_key)]
-        came_from = {start_key: None}
-        cost_so_far = {start_key: 0}
-        self.visited.add(start_key)
+        width, height = board.width, board.height
+        goal_x, goal_y = goal.x, goal.y
+        start_id, goal_id = start.y * width + start.x, goal_y * width + goal_x
+        links = self.get_teleport_links(board)
+        came_from = [-1] * (width * height)
+        cost_so_far = [0] * (width * height)
+        for pos in avoid or ():
+            came_from[pos.y * width + pos.x] = -2
+        came_from[goal_id] = -1
+        came_from[start_id] = start_id
+        frontier = [(0, 0, start_id)]
+        pushed = 1
+        expanded = 0
         while frontier:
-            frontier.sort(key=lambda x: x[0])
-            _, current_key = frontier.pop(0)
-            if current_key == goal_key:
-                path = [Position(x=current_key[0], y=current_key[1])]
-                while current_key != start_key and current_key is not None:
-                    current_key = came_from.get(current_key)
-                    if current_key is not None:
-                        path.insert(0, Position(x=current_key[0], y=current_key[1]))
-                    else:
-                        return False
+            _, _, current = heappop(frontier)
+            if current == goal_id:
+                path = [Position(x=goal_x, y=goal_y)]
+                while current != start_id:
+                    current = came_from[current]
+                    path.append(Position(x=current % width, y=current // width))
+                path.reverse()
                 self.path = path
                 return True
-            if len(self.path) > self.max_path_length:
-                return False
-            current_pos = Position(x=current_key[0], y=current_key[1])
-            for next_pos in self.get_neighbors(board, current_pos):
-                next_key = (next_pos.x, next_pos.y)
-                if next_key not in self.visited:
-                    new_cost = cost_so_far[current_key] + 1
-                    cost_so_far[next_key] = new_cost
-                    priority = new_cost + self.heuristic(next_pos, Position(x=goal_key[0], y=goal_key[1]))
-                    frontier.append((priority, next_key))
-                    came_from[next_key] = current_key
-                    self.visited.add(next_key)
+            new_cost = cost_so_far[current] + 1
+            if new_cost > self.max_path_length:
+                continue
+            expanded += 1
+            if expanded % SEARCH_CHECKPOINT == 0:
+                yield
+            x, y = current % width, current // width
+            neighbors = [
+                (x + dx) + (y + dy) * width
+                for dx, dy in self.directions
+                if 0 <= x + dx < width and 0 <= y + dy < height
+            ]
+            neighbors.extend(links.get(current, ()))
+            for next_id in neighbors:
+                if came_from[next_id] == -1:
+                    came_from[next_id] = current
+                    cost_so_far[next_id] = new_cost
+                    priority = new_cost + abs(next_id % width - goal_x) + abs(next_id // width - goal_y)
+                    heappush(frontier, (priority, pushed, next_id))
+                    pushed += 1
         return False
 
+    def plan_path(self, board: Board, start: Position, goal: Position) -> bool:
+        return _run(self.plan_path_steps(board, start, goal))
+
+    def plan_path_steps(self, board: Board, start: Position, goal: Position) -> Generator[None, None, bool]:
+        """
+        Make self.path lead from `start` to `goal`, continuing the cached
+        route when it was planned for the same goal and teleporter layout, the
+        bot is still on it and no other bot stands on the rest of it.
+        Otherwise A* runs again, avoiding the bots that blocked the route.
+        A diamond target that disappeared is never the goal again, so its
+        route is not reused either.
+
+        Yields at the checkpoints of A*. If it is not resumed, the search is
+        left in self.pending_search for refine to finish.
+        """
+        key = ((goal.x, goal.y), self.get_teleporter_layout(board))
+        avoid = None
+        if self.path and self.path_key == key:
+            index = self.find_on_path(start)
+            if index is not None:
+                route = {(p.x, p.y) for p in self.path[index + 1 :]}
+                avoid = [
+                    bot.position
+                    for bot in board.bots
+                    if (bot.position.x, bot.position.y) in route
+                    and bot.position != start
+                ]
+                if not avoid:
+                    self.path_index = index
+                    self.path_cache_hits += 1
+                    return True
+        self.path_cache_misses += 1
+        self.path_key = None
+        search = self.search_a_star(board, start, goal, avoid)
+        self.pending_search = (key, search)
+        while True:
+            try:
+                next(search)
+            except StopIteration as done:
+                found = done.value
+                break
+            yield
+        self.pending_search = None
+        self.path_key = key if found else None
+        return found
+
+    def refine(self, until: float) -> bool:
+        # A* yang terpotong budget diselesaikan di sini, jadi tick berikutnya
+        # memakai rute dari cache
+        if self.pending_search is None:
+            return False
+        key, search = self.pending_search
+        while perf_counter() < until:
+            try:
+                next(search)
+            except StopIteration as done:
+                self.pending_search = None
+                self.path_key = key if done.value else None
+                return False
+        return True
+
+    def find_on_path(self, position: Position) -> Optional[int]:
+        """Index of `position` on self.path, searching from the current step on."""
+        for index in range(self.path_index, len(self.path)):
+            step = self.path[index]
+            if step.x == position.x and step.y == position.y:
+                return index
+        return None
+
+    def path_cache_stats(self) -> dict:
+        lookups = self.path_cache_hits + self.path_cache_misses
+        return {
+            "hits": self.path_cache_hits,
+            "misses": self.path_cache_misses,
+            "hit_rate": self.path_cache_hits / lookups if lookups else 0.0,
+        }
+
+    def get_random_move(self, position: Position, board: Optional[Board]) -> Tuple[int, int]:
+        board = board or self.current_board
+        moves = [
+            (dx, dy)
+            for dx, dy in self.directions
+            if 0 <= position.x + dx < board.width and 0 <= position.y + dy < board.height
+        ]
+        return random.choice(moves)
+
     def get_next_move_from_path(self, current_pos: Position) -> Tuple[int, int]:
         if not self.path or self.path_index >= len(self.path) - 1:
             return self.get_random_move(current_pos, None)
@@ -88,52 +252,52 @@ class original(BaseLogic):
         self.path_index += 1
         return get_direction(current_pos.x, current_pos.y, next_pos.x, next_pos.y)
 
-    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+    def move_along_path(self, board: Board, goal: Position) -> Iterator[Optional[Tuple[int, int]]]:
+        # Langkah langsung ke goal sebagai jawaban sementara selama A* berjalan
+        if goal.x != self.position.x or goal.y != self.position.y:
+            yield get_direction(self.position.x, self.position.y, goal.x, goal.y)
+        if (yield from self.plan_path_steps(board, self.position, goal)):
+            yield self.get_next_move_from_path(self.position)
+        else:
+            yield self.get_random_move(self.position, board)
+
+    def fallback_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        return self.get_random_move(board_bot.position, board)
+
+    def plan(self, board_bot: GameObject, board: Board) -> Iterator[Optional[Tuple[int, int]]]:
         self.current_board = board
         self.position = board_bot.position
-        diamonds = [obj for obj in board.game_objects if obj.type == "DiamondGameObject"]
+        diamonds = board.diamonds
         base_position = board_bot.properties.base
 
-        if self.goal_position and not any(d.position.x == self.goal_position.x and d.position.y == self.goal_position.y for d in diamonds):
+        if self.goal_position and not any(o.type == "DiamondGameObject" for o in board.objects_at(self.goal_position.x, self.goal_position.y)):
             self.path = []
             self.goal_position = None
 
         if self.should_return_to_base(board_bot, board):
-            if not self.find_path_a_star(board, self.position, base_position):
-                return self.get_random_move(self.position, board)
-            self.path_index = 0
-            return self.get_next_move_from_path(self.position)
+            yield from self.move_along_path(board, base_position)
+            return
 
         cluster_radius = 2
         target_diamond = self.select_target_diamond(board, diamonds)
         cluster_nearby = target_diamond and self.heuristic(self.position, target_diamond.position) <= cluster_radius
 
-        red_buttons = [obj for obj in board.game_objects if obj.type == "DiamondButtonGameObject"]
+        red_buttons = board.diamond_buttons
         red_button_nearby = next((rb for rb in red_buttons if self.heuristic(self.position, rb.position) <= 2), None)
 
         if cluster_nearby:
-            if self.find_path_a_star(board, self.position, target_diamond.position):
-                self.path_index = 0
-                return self.get_next_move_from_path(self.position)
-            return self.get_random_move(self.position, board)
-
-        if red_button_nearby:
-            if self.find_path_a_star(board, self.position, red_button_nearby.position):
-                self.path_index = 0
-                return self.get_next_move_from_path(self.position)
-            return self.get_random_move(self.position, board)
-
-        if target_diamond:
-            if self.find_path_a_star(board, self.position, target_diamond.position):
-                self.path_index = 0
-                return self.get_next_move_from_path(self.position)
-            return self.get_random_move(self.position, board)
-        return self.get_random_move(self.position, board)
+            yield from self.move_along_path(board, target_diamond.position)
+        elif red_button_nearby:
+            yield from self.move_along_path(board, red_button_nearby.position)
+        elif target_diamond:
+            yield from self.move_along_path(board, target_diamond.position)
+        else:
+            yield self.get_random_move(self.position, board)
 
     def should_return_to_base(self, board_bot: GameObject, board: Board) -> bool:
         steps_to_base = self.heuristic(self.position, board_bot.properties.base)
         time_left = int(board_bot.properties.milliseconds_left / 1000)
-        diamonds = [obj for obj in board.game_objects if obj.type == "DiamondGameObject"]
+        diamonds = board.diamonds
         diamond_nearby = any(self.heuristic(self.position, d.position) <= 3 for d in diamonds)
         return (
             board_bot.properties.diamonds >= self.inventory_full_threshold
@@ -142,6 +306,20 @@ class original(BaseLogic):
             or (time_left <= 5 and not diamond_nearby)
         )
 
+    def get_cluster(self, board: Board, center: Position, radius: int, order: dict) -> List[GameObject]:
+        """
+        Diamonds within `radius` of `center` that have an entry in `order`
+        (id -> index in the candidate list), sorted by that index.
+        """
+        cluster = [
+            obj
+            for x, y in cells_within(center.x, center.y, radius, board.width, board.height)
+            for obj in board.objects_at(x, y)
+            if obj.id in order
+        ]
+        cluster.sort(key=lambda d: order[d.id])
+        return cluster
+
     def select_target_diamond(self, board: Board, diamonds: List[GameObject]) -> Optional[GameObject]:
         """
         Pilih diamond target terbaik (cluster terdekat/terbaik), jika tidak ada cluster, ambil diamond terdekat.
@@ -161,22 +339,19 @@ class original(BaseLogic):
         max_cluster_score = 0
         best_cluster: List[GameObject] = []
         min_total_dist = float('inf')
-        teleporters = [obj for obj in board.game_objects if obj.type == "TeleportGameObject"]
+        distances = board.distances
 
         near_base_diamonds = [d for d in diamonds if self.heuristic(d.position, base_pos) <= 5]
         if near_base_diamonds:
+            density = DiamondDensity.for_diamonds(board, near_base_diamonds)
+            order = {d.id: i for i, d in enumerate(near_base_diamonds)}
             for diamond in near_base_diamonds:
-                cluster = [other for other in near_base_diamonds if self.heuristic(diamond.position, other.position) <= cluster_radius]
-                cluster_score = sum(2 if d.properties.points == 2 else 1 for d in cluster)
+                cluster = self.get_cluster(board, diamond.position, cluster_radius, order)
+                blue, red = density.manhattan(diamond.position.x, diamond.position.y, cluster_radius)
+                cluster_score = blue + 2 * red
                 min_dist = float('inf')
                 for d in cluster:
-                    dist_direct = self.heuristic(self.position, d.position)
-                    dist_tp = dist_direct
-                    if len(teleporters) >= 2:
-                        for tp1 in teleporters:
-                            for tp2 in teleporters:
-                                if tp1.position != tp2.position:
-                                    dist_tp = min(dist_tp, self.heuristic(self.position, tp1.position) + 1 + self.heuristic(tp2.position, d.position))
+                    dist_tp = distances.between(self.position, d.position)
                     min_dist = min(min_dist, dist_tp)
                 total_dist = min_dist
                 if (cluster_score > max_cluster_score) or (
@@ -191,18 +366,15 @@ class original(BaseLogic):
         max_cluster_score = 0
         best_cluster = []
         min_total_dist = float('inf')
+        density = DiamondDensity.for_diamonds(board, diamonds)
+        order = {d.id: i for i, d in enumerate(diamonds)}
         for diamond in diamonds:
-            cluster = [other for other in diamonds if self.heuristic(diamond.position, other.position) <= cluster_radius]
-            cluster_score = sum(2 if d.properties.points == 2 else 1 for d in cluster)
+            cluster = self.get_cluster(board, diamond.position, cluster_radius, order)
+            blue, red = density.manhattan(diamond.position.x, diamond.position.y, cluster_radius)
+            cluster_score = blue + 2 * red
             min_dist = float('inf')
             for d in cluster:
-                dist_direct = self.heuristic(self.position, d.position)
-                dist_tp = dist_direct
-                if len(teleporters) >= 2:
-                    for tp1 in teleporters:
-                        for tp2 in teleporters:
-                            if tp1.position != tp2.position:
-                                dist_tp = min(dist_tp, self.heuristic(self.position, tp1.position) + 1 + self.heuristic(tp2.position, d.position))
+                dist_tp = distances.between(self.position, d.position)
                 min_dist = min(min_dist, dist_tp)
             total_dist = min_dist
             if inventory >= 3:
@@ -0,0 +1,156 @@
+"""
+Trip planning for greedy12: which diamonds to collect, in which order, before
+walking back to base.
+"""
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+from game.contention import UNREACHABLE
+from game.models import Board, GameObject
+
+# Diamonds nearest to the bot that a trip is planned over. The search grows
+# with the subsets of these that fit in the inventory, 8 keeps it at a few
+# milliseconds
+ROUTE_CANDIDATES = 8
+
+
+class RoutePlanner:
+    """
+    Picks the trip with the most points per step: an ordered set of the
+    nearest diamonds, then the base, counting the diamonds already carried
+    and the steps of the whole trip. A red diamond takes 2 of the
+    inventory_size slots, a trip must reach the base before the bot's
+    milliseconds_left run out and it skips diamonds an opponent heading for
+    them gets to first (see board.contention).
+
+    The search is a dynamic program over the subsets of the candidates,
+    grown one diamond at a time, that keeps the shortest walk for each
+    (subset, last diamond). Subsets that do not fit in the inventory or
+    cannot be back at base in time are never extended.
+
+    A planned trip is followed until it no longer holds: a diamond on it
+    vanished or an opponent now gets to it first, new diamonds appeared,
+    teleporters moved or the bot lost diamonds. Diamonds elsewhere
+    disappearing do not change it.
+    """
+
+    def __init__(self, candidates: int = ROUTE_CANDIDATES):
+        self.candidates = candidates
+        # Diamonds left to collect, None if there is no trip worth making
+        self.route: Optional[List[GameObject]] = None
+        self.carrying = 0
+        self.layout: Optional[tuple] = None
+        self.plans = 0
+        self.reuses = 0
+
+    def next_stop(self, board_bot: GameObject, board: Board) -> Optional[GameObject]:
+        """
+        The diamond to walk to, None to go back to base. Raises LookupError
+        if no trip is worth making, e.g. nothing fits in the time left.
+        """
+        if self._follow(board_bot, board):
+            self.reuses += 1
+        else:
+            self.route = self.plan(board_bot, board)
+            self.carrying = board_bot.properties.diamonds
+            self.layout = tuple((t.position.x, t.position.y) for t in board.teleporters)
+            self.plans += 1
+        if self.route is None:
+            raise LookupError("no trip")
+        return self.route[0] if self.route else None
+
+    def _follow(self, board_bot: GameObject, board: Board) -> bool:
+        """Whether the current trip still holds, dropping the diamond just collected."""
+        changes = board.changes
+        if self.route is None or changes is None or changes.full:
+            return False
+        if changes.diamonds_added:
+            return False
+        if self.layout != tuple((t.position.x, t.position.y) for t in board.teleporters):
+            return False
+        route = self.route
+        carrying = self.carrying
+        if route and board.get_object(route[0].id) is None:
+            # Collected if the bot stands where it was, taken by another otherwise
+            if board_bot.position != route[0].position:
+                return False
+            carrying += route[0].properties.points
+            route = route[1:]
+        if board_bot.properties.diamonds != carrying:
+            return False
+        if any(board.get_object(d.id) is None for d in route):
+            return False
+        if route:
+            contention = board.contention(board_bot)
+            dist = board.distances.matrix([board_bot.position] + [d.position for d in route])
+            steps = 0
+            for index, diamond in enumerate(route):
+                steps += dist[index][index + 1]
+                if contention.lost(diamond, steps):
+                    return False
+        self.route, self.carrying = route, carrying
+        return True
+
+    def plan(self, board_bot: GameObject, board: Board) -> Optional[List[GameObject]]:
+        """The diamonds of the best trip in order, None if there is no trip."""
+        props = board_bot.properties
+        position, base = board_bot.position, props.base
+        carrying = props.diamonds
+        room = props.inventory_size - carrying
+        steps_left = (
+            props.milliseconds_left // max(board.minimum_delay_between_moves, 1)
+            if props.milliseconds_left is not None
+            else float("inf")
+        )
+
+        contention = board.contention(board_bot)
+        field = contention.ours
+        width = board.width
+        candidates = heapq.nsmallest(
+            self.candidates,
+            (
+                d
+                for d in board.diamonds
+                if d.properties.points <= room and not contention.lost(d)
+            ),
+            key=lambda d: field[d.position.y * width + d.position.x],
+        )
+        # 0 is the bot, 1 the base, the candidates follow
+        dist = board.distances.matrix([position, base] + [d.position for d in candidates])
+        points = [d.properties.points for d in candidates]
+        to_base = [row[1] for row in dist[2:]]
+        # Steps of an opponent heading for each candidate, see ContentionMap.lost
+        opponents = [contention.targets.get(d.id, UNREACHABLE) for d in candidates]
+
+        best_rate, best = 0.0, None
+        if carrying and dist[0][1] <= steps_left:
+            best_rate, best = carrying / max(dist[0][1], 1), ()
+        # (subset, last candidate) -> (steps, points, order), one size at a time
+        layer: Dict[Tuple[int, int], Tuple[int, int, tuple]] = {}
+        for k in range(len(candidates)):
+            steps = dist[0][k + 2]
+            # Skip a diamond the bot stands on without having picked it up
+            if 0 < steps and steps + to_base[k] <= steps_left:
+                layer[(1 << k, k)] = (steps, points[k], (k,))
+        while layer:
+            grown = {}
+            for (subset, last), (steps, collected, order) in layer.items():
+                rate = (carrying + collected) / (steps + to_base[last])
+                if rate > best_rate:
+                    best_rate, best = rate, order
+                row = dist[last + 2]
+                for k in range(len(candidates)):
+                    if subset >> k & 1 or collected + points[k] > room:
+                        continue
+                    walked = steps + row[k + 2]
+                    if walked + to_base[k] > steps_left or walked > opponents[k]:
+                        continue
+                    key = (subset | 1 << k, k)
+                    known = grown.get(key)
+                    if known is None or walked < known[0]:
+                        grown[key] = (walked, collected + points[k], order + (k,))
+            layer = grown
+
+        if best is None:
+            return None
+        return [candidates[k] for k in best]
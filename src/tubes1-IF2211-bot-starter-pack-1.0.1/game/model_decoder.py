@@ -0,0 +1,115 @@
+"""
+Decoders for game.models, generated once at import from the dataclass type
+hints. A decoder turns the snake case dict produced by decode.decode straight
+into model instances, without dacite's per-call type introspection.
+
+Like dacite, missing fields get their default (None for Optional fields) and
+unknown keys are ignored. Unlike dacite, values are not type checked: the game
+engine is trusted to send the types the models declare.
+"""
+import dataclasses
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+
+from game import models
+
+T = TypeVar("T")
+
+_decoders: Dict[type, Callable[[dict], Any]] = {}
+
+
+def _unwrap_optional(tp):
+    if get_origin(tp) is Union:
+        args = [a for a in get_args(tp) if a is not type(None)]
+        if len(args) == 1 and len(get_args(tp)) == 2:
+            return args[0], True
+    return tp, False
+
+
+def _is_plain(tp) -> bool:
+    return tp in (int, float, str, bool, Any)
+
+
+def _value_code(tp, var: str, namespace: dict) -> str:
+    """Expression converting the raw value in `var` into type `tp`."""
+    inner, optional = _unwrap_optional(tp)
+    if _is_plain(inner):
+        return var
+    if dataclasses.is_dataclass(inner):
+        name = "_decode_{}".format(inner.__name__)
+        namespace[name] = _compile(inner)
+        code = "{}({})".format(name, var)
+    elif get_origin(inner) in (list, List) and get_args(inner):
+        (item,) = get_args(inner)
+        if _is_plain(item):
+            code = "list({})".format(var)
+        elif dataclasses.is_dataclass(item):
+            name = "_decode_{}".format(item.__name__)
+            namespace[name] = _compile(item)
+            code = "[{}(item) for item in {}]".format(name, var)
+        else:
+            raise TypeError("Unsupported list item type {!r}".format(item))
+    else:
+        raise TypeError("Unsupported field type {!r}".format(tp))
+    if optional:
+        code = "None if {0} is None else {1}".format(var, code)
+    return code
+
+
+def _compile(cls: type) -> Callable[[dict], Any]:
+    if cls in _decoders:
+        return _decoders[cls]
+    hints = get_type_hints(cls)
+    namespace = {"_cls": cls}
+    lines = ["def _decode_{}(data):".format(cls.__name__)]
+    arguments = []
+    for index, field in enumerate(dataclasses.fields(cls)):
+        if not field.init:
+            continue
+        var = "v{}".format(index)
+        if field.default is not dataclasses.MISSING:
+            default = "_default_{}".format(index)
+            namespace[default] = field.default
+            lines.append("    {} = data.get({!r}, {})".format(var, field.name, default))
+        elif field.default_factory is not dataclasses.MISSING:
+            factory = "_factory_{}".format(index)
+            namespace[factory] = field.default_factory
+            lines.append(
+                "    {0} = data[{1!r}] if {1!r} in data else {2}()".format(
+                    var, field.name, factory
+                )
+            )
+        elif _unwrap_optional(hints[field.name])[1]:
+            lines.append("    {} = data.get({!r})".format(var, field.name))
+        else:
+            lines.append("    {} = data[{!r}]".format(var, field.name))
+        arguments.append(
+            "{}={}".format(field.name, _value_code(hints[field.name], var, namespace))
+        )
+    lines.append("    return _cls({})".format(", ".join(arguments)))
+    exec("\n".join(lines), namespace)
+    decoder = namespace["_decode_{}".format(cls.__name__)]
+    _decoders[cls] = decoder
+    return decoder
+
+
+def from_dict(data_class: Type[T], data: dict) -> T:
+    """Drop-in replacement for dacite.from_dict for the classes in game.models."""
+    decoder = _decoders.get(data_class)
+    if decoder is None:
+        decoder = _compile(data_class)
+    return decoder(data)
+
+
+for _model in (models.Bot, models.Board):
+    _compile(_model)
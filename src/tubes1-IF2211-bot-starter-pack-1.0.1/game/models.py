@@ -1,26 +1,47 @@
-from dataclasses import dataclass
-from typing import List, Optional, Union
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
 from colorama import Fore, Style
+from game.contention import ContentionMap
+from game.distance import DistanceFields
+from game.spatial import DiamondDensity
 
+# Small integer codes for object types, used by the column view of a board
+OBJECT_TYPE_CODES = {
+    "BotGameObject": 1,
+    "BaseGameObject": 2,
+    "DiamondGameObject": 3,
+    "DiamondButtonGameObject": 4,
+    "TeleportGameObject": 5,
+}
 
-@dataclass
+
+def _index_of(objects: List, obj) -> int:
+    """Index of `obj` itself in `objects`, list.index would compare by value."""
+    for index, other in enumerate(objects):
+        if other is obj:
+            return index
+    raise ValueError(obj)
+
+
+@dataclass(slots=True)
 class Bot:
     name: str
     email: str
     id: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     y: int
     x: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Base(Position): ...
 
 
-@dataclass
+@dataclass(slots=True)
 class Properties:
     points: Optional[int] = None
     pair_id: Optional[str] = None
@@ -34,7 +55,7 @@ class Properties:
     base: Optional[Base] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class GameObject:
     id: int
     position: Position
@@ -42,7 +63,7 @@ class GameObject:
     properties: Optional[Properties] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Config:
     generation_ratio: Optional[float] = None
     min_ratio_for_generation: Optional[float] = None
@@ -53,13 +74,88 @@ class Config:
     can_tackle: Optional[bool] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Feature:
     name: str
     config: Optional[Config] = None
 
 
-@dataclass
+@dataclass(slots=True)
+class BoardColumns:
+    """
+    Struct-of-arrays copy of a board's game objects: entry i of every array
+    describes game_objects[i]. `points` holds the points of a diamond and the
+    carried diamonds of a bot, `type_codes` uses OBJECT_TYPE_CODES (0 for
+    unknown types).
+    """
+
+    ids: array
+    xs: array
+    ys: array
+    type_codes: array
+    points: array
+
+    @classmethod
+    def from_objects(cls, game_objects: List["GameObject"]) -> "BoardColumns":
+        ids, xs, ys, type_codes, points = (array("i") for _ in range(5))
+        for obj in game_objects:
+            ids.append(obj.id)
+            xs.append(obj.position.x)
+            ys.append(obj.position.y)
+            type_codes.append(OBJECT_TYPE_CODES.get(obj.type, 0))
+            props = obj.properties
+            value = None
+            if props is not None:
+                value = props.points if props.points is not None else props.diamonds
+            points.append(value or 0)
+        return cls(ids, xs, ys, type_codes, points)
+
+
+@dataclass(slots=True)
+class ChangeSet:
+    """
+    What changed on a board since the previous snapshot, by object id.
+    `moved` and `changed` hold (before, after) pairs, `changed` are objects
+    that kept their position but not their properties (e.g. a bot's score).
+    A first snapshot has everything in `added` and `full` set.
+    """
+
+    added: List[GameObject] = field(default_factory=list)
+    removed: List[GameObject] = field(default_factory=list)
+    moved: List[Tuple[GameObject, GameObject]] = field(default_factory=list)
+    changed: List[Tuple[GameObject, GameObject]] = field(default_factory=list)
+    full: bool = False
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.moved) + len(self.changed)
+
+    @property
+    def diamonds_added(self) -> List[GameObject]:
+        return [o for o in self.added if o.type == "DiamondGameObject"]
+
+    @property
+    def diamonds_removed(self) -> List[GameObject]:
+        return [o for o in self.removed if o.type == "DiamondGameObject"]
+
+    @property
+    def bots_moved(self) -> List[Tuple[GameObject, GameObject]]:
+        return [pair for pair in self.moved if pair[1].type == "BotGameObject"]
+
+    @property
+    def teleporters_relocated(self) -> List[Tuple[GameObject, GameObject]]:
+        return [pair for pair in self.moved if pair[1].type == "TeleportGameObject"]
+
+    def touches(self, object_type: str) -> bool:
+        """Whether any object of this type was added, removed, moved or changed."""
+        return (
+            any(o.type == object_type for o in self.added)
+            or any(o.type == object_type for o in self.removed)
+            or any(after.type == object_type for _, after in self.moved)
+            or any(after.type == object_type for _, after in self.changed)
+        )
+
+
+@dataclass(slots=True)
 class Board:
     id: int
     width: int
@@ -67,20 +163,224 @@ class Board:
     features: List[Feature]
     minimum_delay_between_moves: int
     game_objects: Optional[List[GameObject]]
+    _columns: Optional[BoardColumns] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _by_type: Dict[str, List[GameObject]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _by_cell: Dict[Tuple[int, int], List[GameObject]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _by_id: Dict[int, GameObject] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _bots_by_name: Dict[str, GameObject] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _density: Optional[DiamondDensity] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _distances: Optional[DistanceFields] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _contention: Dict[int, ContentionMap] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _indexed: bool = field(default=False, init=False, repr=False, compare=False)
+    # Set by BoardStateStore when the board was compared with the previous one
+    changes: Optional[ChangeSet] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def _ensure_indexes(self):
+        if not self._indexed:
+            self._build_indexes()
+
+    def _build_indexes(self):
+        """
+        Index the snapshot on first use so type, cell, id and bot name lookups
+        do not have to scan game_objects. Every list keeps the order of
+        game_objects.
+        """
+        by_type, by_cell, by_id, bots_by_name = {}, {}, {}, {}
+        for obj in self.game_objects or []:
+            by_type.setdefault(obj.type, []).append(obj)
+            by_cell.setdefault((obj.position.x, obj.position.y), []).append(obj)
+            by_id.setdefault(obj.id, obj)
+            if obj.type == "BotGameObject" and obj.properties is not None:
+                bots_by_name.setdefault(obj.properties.name, obj)
+        self._by_type = by_type
+        self._by_cell = by_cell
+        self._by_id = by_id
+        self._bots_by_name = bots_by_name
+        self._columns = None
+        self._density = None
+        self._distances = None
+        self._contention = {}
+        self._indexed = True
+
+    def _update_indexes(self, previous: "Board", changes: ChangeSet):
+        """
+        Derive the indexes from those of `previous` and the changes since,
+        instead of indexing every object again. The dicts are copied, but
+        only the lists of the types and cells that changed are rebuilt, so
+        `previous` keeps valid indexes. Objects keep their place in the type
+        lists and new ones are appended, which is also how the game engine
+        orders game_objects. A cell that an object enters while others are
+        on it is put back in the order of game_objects, which costs a pass
+        over game_objects on such ticks, so objects_at returns the same list
+        as after a full rebuild. The diamond density is kept if no diamond was
+        added or removed.
+        """
+        previous._ensure_indexes()
+        by_type, by_cell = dict(previous._by_type), dict(previous._by_cell)
+        by_id, bots_by_name = dict(previous._by_id), dict(previous._bots_by_name)
+        copied_types, copied_cells = set(), set()
+
+        def type_list(object_type):
+            if object_type not in copied_types:
+                by_type[object_type] = list(by_type.get(object_type, ()))
+                copied_types.add(object_type)
+            return by_type[object_type]
+
+        def cell_list(position):
+            cell = (position.x, position.y)
+            if cell not in copied_cells:
+                by_cell[cell] = list(by_cell.get(cell, ()))
+                copied_cells.add(cell)
+            return by_cell[cell]
+
+        crowded = set()
+        removed_ids = {}
+        for obj in changes.removed:
+            removed_ids.setdefault(obj.type, set()).add(obj.id)
+            objects = cell_list(obj.position)
+            del objects[_index_of(objects, obj)]
+            del by_id[obj.id]
+            if obj.type == "BotGameObject" and obj.properties is not None:
+                bots_by_name.pop(obj.properties.name, None)
+        # One pass per type rather than a list.remove per object, which would
+        # compare every diamond before it by value
+        for object_type, ids in removed_ids.items():
+            by_type[object_type] = [
+                o for o in by_type.get(object_type, ()) if o.id not in ids
+            ]
+            copied_types.add(object_type)
+        for before, after in changes.moved + changes.changed:
+            objects = type_list(after.type)
+            objects[_index_of(objects, before)] = after
+            if before.position == after.position:
+                objects = cell_list(after.position)
+                objects[_index_of(objects, before)] = after
+            else:
+                objects = cell_list(before.position)
+                del objects[_index_of(objects, before)]
+                objects = cell_list(after.position)
+                objects.append(after)
+                if len(objects) > 1:
+                    crowded.add((after.position.x, after.position.y))
+            by_id[after.id] = after
+            if after.type == "BotGameObject" and after.properties is not None:
+                bots_by_name[after.properties.name] = after
+        for obj in changes.added:
+            type_list(obj.type).append(obj)
+            objects = cell_list(obj.position)
+            objects.append(obj)
+            if len(objects) > 1:
+                crowded.add((obj.position.x, obj.position.y))
+            by_id.setdefault(obj.id, obj)
+            if obj.type == "BotGameObject" and obj.properties is not None:
+                bots_by_name.setdefault(obj.properties.name, obj)
+        if crowded:
+            # Objects that entered a cell holding others were appended, put
+            # those cells back in the order of game_objects
+            members = {id(o) for cell in crowded for o in by_cell[cell]}
+            for cell in crowded:
+                by_cell[cell] = []
+            for obj in self.game_objects or []:
+                if id(obj) in members:
+                    by_cell[(obj.position.x, obj.position.y)].append(obj)
+        for cell in copied_cells:
+            if not by_cell[cell]:
+                del by_cell[cell]
+        for object_type in copied_types:
+            if not by_type[object_type]:
+                del by_type[object_type]
+
+        self._by_type = by_type
+        self._by_cell = by_cell
+        self._by_id = by_id
+        self._bots_by_name = bots_by_name
+        self._columns = None
+        self._density = None
+        self._distances = None
+        self._contention = {}
+        if not changes.touches("DiamondGameObject"):
+            self._density = previous._density
+        self._indexed = True
+
+    @property
+    def columns(self) -> BoardColumns:
+        """Typed arrays of the object positions, types and points, built once."""
+        if self._columns is None:
+            self._columns = BoardColumns.from_objects(self.game_objects or [])
+        return self._columns
+
+    @property
+    def density(self) -> DiamondDensity:
+        """Summed-area tables of the diamonds on this board, built once."""
+        if self._density is None:
+            self._density = DiamondDensity(self.width, self.height, self.diamonds)
+        return self._density
+
+    @property
+    def distances(self) -> DistanceFields:
+        """Teleporter aware distance fields of this board, shared by all logics."""
+        if self._distances is None:
+            self._distances = DistanceFields(self.width, self.height, self.teleporters)
+        return self._distances
+
+    def contention(self, board_bot: GameObject) -> ContentionMap:
+        """The other bots' reach and tackle threats as seen by board_bot, built once per bot."""
+        contention = self._contention.get(board_bot.id)
+        if contention is None:
+            contention = self._contention[board_bot.id] = ContentionMap(self, board_bot)
+        return contention
+
+    def objects_of_type(self, object_type: str) -> List[GameObject]:
+        """All objects of the given type. The list is shared, do not modify it."""
+        self._ensure_indexes()
+        return self._by_type.get(object_type, [])
+
+    def objects_at(self, x: int, y: int) -> List[GameObject]:
+        """All objects on cell (x, y). The list is shared, do not modify it."""
+        self._ensure_indexes()
+        return self._by_cell.get((x, y), [])
+
+    def get_object(self, object_id: int) -> Optional[GameObject]:
+        self._ensure_indexes()
+        return self._by_id.get(object_id)
 
     @property
     def bots(self) -> List[GameObject]:
-        return [d for d in self.game_objects if d.type == "BotGameObject"]
+        return self.objects_of_type("BotGameObject")
 
     @property
     def diamonds(self) -> List[GameObject]:
-        return [d for d in self.game_objects if d.type == "DiamondGameObject"]
+        return self.objects_of_type("DiamondGameObject")
+
+    @property
+    def teleporters(self) -> List[GameObject]:
+        return self.objects_of_type("TeleportGameObject")
+
+    @property
+    def diamond_buttons(self) -> List[GameObject]:
+        return self.objects_of_type("DiamondButtonGameObject")
 
     def get_bot(self, bot: Bot) -> Optional[GameObject]:
-        for b in self.bots:
-            if b.properties.name == bot.name:
-                return b
-        return None
+        self._ensure_indexes()
+        return self._bots_by_name.get(bot.name)
 
     def is_valid_move(
         self, current_position: Position, delta_x: int, delta_y: int
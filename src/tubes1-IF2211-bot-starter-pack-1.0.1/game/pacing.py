@@ -0,0 +1,78 @@
+import asyncio
+from time import perf_counter, sleep
+from typing import Callable, Optional
+
+# Added to every deadline so jitter in request latency does not make a move
+# reach the server before its rate limit has expired.
+DEADLINE_MARGIN = 0.005
+
+
+class MovePacer:
+    """
+    Schedules moves against the board's rate limit.
+
+    Every move gets a deadline of `minimum_delay_between_moves * time_factor`
+    after the previous one was sent, so the time spent in logic and on the
+    network is subtracted from the wait instead of being added to it.
+    """
+
+    def __init__(
+        self,
+        minimum_delay_ms: int,
+        time_factor: float = 1,
+        margin: float = DEADLINE_MARGIN,
+        clock: Callable[[], float] = perf_counter,
+    ):
+        self.minimum_delay = minimum_delay_ms / 1000
+        self.delay = self.minimum_delay * time_factor
+        self.margin = margin
+        self.clock = clock
+        self.moves = 0
+        self.started_at: Optional[float] = None
+        self.next_move_at: Optional[float] = None
+
+    def remaining(self) -> float:
+        """Seconds left until the next move may be sent."""
+        if self.next_move_at is None:
+            return 0.0
+        return max(0.0, self.next_move_at - self.clock())
+
+    def wait(self):
+        remaining = self.remaining()
+        if remaining > 0:
+            sleep(remaining)
+
+    async def wait_async(self):
+        remaining = self.remaining()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+
+    def moved(self):
+        """Record that a move was sent just now."""
+        now = self.clock()
+        if self.started_at is None:
+            self.started_at = now
+        self.moves += 1
+        self.next_move_at = now + self.delay + self.margin
+
+    def skipped(self):
+        """Record a tick without a move, it still waits for one delay."""
+        self.next_move_at = self.clock() + self.delay
+
+    def stats(self) -> dict:
+        """
+        Moves sent compared to the most moves the server's rate limit would
+        have allowed in the same time.
+        """
+        if self.started_at is None:
+            return {"moves": 0, "max_moves": 0, "ratio": 0.0, "seconds": 0.0}
+        seconds = self.clock() - self.started_at
+        max_moves = (
+            int(seconds / self.minimum_delay) + 1 if self.minimum_delay else self.moves
+        )
+        return {
+            "moves": self.moves,
+            "max_moves": max_moves,
+            "ratio": self.moves / max_moves if max_moves else 0.0,
+            "seconds": seconds,
+        }
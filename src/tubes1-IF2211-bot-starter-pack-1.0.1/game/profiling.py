@@ -0,0 +1,112 @@
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+from typing import Dict, List
+
+# Seconds between two samples of the sampling profiler
+SAMPLE_INTERVAL = 0.002
+
+# Phases of one tick of the game loop, in the order they happen
+PHASES = ("http", "decode", "from_dict", "next_move", "refine", "sleep")
+
+# Shared no-op context for code paths that may run without a profiler
+NO_PHASE = nullcontext()
+
+
+class PhaseProfiler:
+    """
+    Profiles a game session split into the phases of the game loop: the HTTP
+    round trip, decode (JSON parsing and converting the keys), from_dict,
+    next_move, refining the logic's plans and sleeping until the next move is
+    allowed.
+
+    Three views are kept while the profiler runs:
+
+    - wall time per phase, measured around every `phase()` block
+    - cProfile of the thread that started the profiler, for a pstats file
+    - a sampling thread that records the stack of every thread each
+      SAMPLE_INTERVAL, with the thread's current phase as the root frame, for
+      a flamegraph-compatible collapsed stack file. It also sees the executor
+      threads that do the HTTP requests of --async.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.profile = cProfile.Profile()
+        self.seconds: Dict[str, float] = {phase: 0.0 for phase in PHASES}
+        self.calls: Dict[str, int] = {phase: 0 for phase in PHASES}
+        self.stacks: Counter = Counter()
+        self._current: Dict[int, List[str]] = {}
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(
+            target=self._sample, name="phase-sampler", daemon=True
+        )
+
+    def start(self):
+        self._sampler.start()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self._stop.set()
+        self._sampler.join()
+
+    @contextmanager
+    def phase(self, name: str):
+        stack = self._current.setdefault(threading.get_ident(), [])
+        stack.append(name)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + perf_counter() - start
+            self.calls[name] = self.calls.get(name, 0) + 1
+            stack.pop()
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                phases = self._current.get(thread_id)
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(
+                        "{} ({}:{})".format(
+                            code.co_name,
+                            os.path.basename(code.co_filename),
+                            code.co_firstlineno,
+                        )
+                    )
+                    frame = frame.f_back
+                frames.append(phases[-1] if phases else "other")
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def write(self, prefix: str) -> List[str]:
+        """Write <prefix>.pstats and <prefix>.collapsed, returns the paths."""
+        pstats_path = prefix + ".pstats"
+        collapsed_path = prefix + ".collapsed"
+        self.profile.dump_stats(pstats_path)
+        with open(collapsed_path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write("{} {}\n".format(stack, count))
+        return [pstats_path, collapsed_path]
+
+    def summary(self, ticks: int) -> List[str]:
+        """One line per phase with its total and per tick wall time."""
+        total = sum(self.seconds.values()) or 1
+        return [
+            "{:<10} {:8.1f} ms total {:7.2f} ms/tick {:4.0%}".format(
+                phase,
+                1000 * seconds,
+                1000 * seconds / ticks if ticks else 0.0,
+                seconds / total,
+            )
+            for phase, seconds in self.seconds.items()
+        ]
@@ -0,0 +1,260 @@
+"""
+Compact append-only log of the board snapshots a bot received, to replay
+games offline (see replay.py).
+
+The file starts with MAGIC, followed by frames of a one byte kind and a four
+byte little endian payload length. A SESSION frame starts each game with
+who played it, then every snapshot is a FULL frame (the whole board) or a
+DELTA frame against the snapshot before it. Payloads are values in a small
+msgpack-like encoding: type tags, varints, and strings written once per
+session and referred to by number afterwards, so the object types and
+property names of thousands of objects cost a byte or two each.
+"""
+import struct
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b"DIAMLOG1"
+
+SESSION, FULL, DELTA = 1, 2, 3
+_FRAME = struct.Struct("<BI")
+_FLOAT = struct.Struct("<d")
+
+# Value tags
+_NONE, _FALSE, _TRUE, _INT, _FLOAT_TAG, _STR, _STR_REF, _LIST, _DICT = range(9)
+
+
+def _pack_varint(value: int, out: bytearray):
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _unpack_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class _Packer:
+    """Encodes values of one session, remembering the strings it wrote."""
+
+    def __init__(self):
+        self.strings: Dict[str, int] = {}
+
+    def pack(self, value, out: bytearray):
+        if value is None:
+            out.append(_NONE)
+        elif value is True:
+            out.append(_TRUE)
+        elif value is False:
+            out.append(_FALSE)
+        elif isinstance(value, int):
+            out.append(_INT)
+            # Zigzag, so small negative numbers stay small
+            _pack_varint(value << 1 if value >= 0 else (-value << 1) - 1, out)
+        elif isinstance(value, float):
+            out.append(_FLOAT_TAG)
+            out += _FLOAT.pack(value)
+        elif isinstance(value, str):
+            index = self.strings.get(value)
+            if index is None:
+                self.strings[value] = len(self.strings)
+                encoded = value.encode()
+                out.append(_STR)
+                _pack_varint(len(encoded), out)
+                out += encoded
+            else:
+                out.append(_STR_REF)
+                _pack_varint(index, out)
+        elif isinstance(value, (list, tuple)):
+            out.append(_LIST)
+            _pack_varint(len(value), out)
+            for item in value:
+                self.pack(item, out)
+        elif isinstance(value, dict):
+            out.append(_DICT)
+            _pack_varint(len(value), out)
+            for key, item in value.items():
+                self.pack(key, out)
+                self.pack(item, out)
+        else:
+            raise TypeError("Cannot record a value of type {}".format(type(value).__name__))
+
+
+class _Unpacker:
+    def __init__(self):
+        self.strings: List[str] = []
+
+    def unpack(self, data: bytes, offset: int = 0):
+        tag = data[offset]
+        offset += 1
+        if tag == _STR_REF:
+            index, offset = _unpack_varint(data, offset)
+            return self.strings[index], offset
+        if tag == _INT:
+            value, offset = _unpack_varint(data, offset)
+            return (value >> 1) ^ -(value & 1), offset
+        if tag == _DICT:
+            size, offset = _unpack_varint(data, offset)
+            result = {}
+            for _ in range(size):
+                key, offset = self.unpack(data, offset)
+                result[key], offset = self.unpack(data, offset)
+            return result, offset
+        if tag == _LIST:
+            size, offset = _unpack_varint(data, offset)
+            result = []
+            for _ in range(size):
+                item, offset = self.unpack(data, offset)
+                result.append(item)
+            return result, offset
+        if tag == _STR:
+            size, offset = _unpack_varint(data, offset)
+            value = data[offset : offset + size].decode()
+            self.strings.append(value)
+            return value, offset + size
+        if tag == _NONE:
+            return None, offset
+        if tag == _TRUE:
+            return True, offset
+        if tag == _FALSE:
+            return False, offset
+        if tag == _FLOAT_TAG:
+            return _FLOAT.unpack_from(data, offset)[0], offset + _FLOAT.size
+        raise ValueError("Unknown value tag {} in recording".format(tag))
+
+
+class BoardRecorder:
+    """
+    Appends the snake case board dicts of one bot's responses to a log file.
+    Only the first snapshot of a session (or of a new board) is written in
+    full. After that a snapshot holds the changed board fields, the ids of
+    removed objects, the objects that are new or differ, and the id order
+    of game_objects only if it is not the previous order with the new
+    objects appended. `move` is the direction whose response the snapshot
+    is, or None for a GET.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file: BinaryIO = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        self.snapshots = 0
+        self.full_snapshots = 0
+        self.bytes_written = 0
+        self._packer = _Packer()
+        self._previous: Optional[dict] = None
+        self._previous_objects: Dict[int, dict] = {}
+
+    def _write(self, kind: int, value):
+        payload = bytearray()
+        self._packer.pack(value, payload)
+        self.file.write(_FRAME.pack(kind, len(payload)))
+        self.file.write(payload)
+        # A game that crashes still leaves every snapshot before the crash
+        self.file.flush()
+        self.bytes_written += _FRAME.size + len(payload)
+
+    def start(self, **session):
+        """Start a session, e.g. start(bot="name", logic="greedy12", board=1)."""
+        self._packer = _Packer()
+        self._previous = None
+        self._previous_objects = {}
+        self._write(SESSION, session)
+
+    def record(self, data: dict, move: Optional[str] = None):
+        objects = data.get("game_objects") or []
+        by_id = {raw["id"]: raw for raw in objects}
+        previous = self._previous
+        if previous is None or any(
+            previous[key] != data[key] for key in ("id", "width", "height")
+        ):
+            self._write(FULL, {"move": move, "board": data})
+            self.full_snapshots += 1
+        else:
+            previous_objects = self._previous_objects
+            removed = [i for i in previous_objects if i not in by_id]
+            changed = [
+                raw for raw in objects if previous_objects.get(raw["id"]) != raw
+            ]
+            gone = set(removed)
+            expected = [i for i in previous_objects if i not in gone]
+            expected += [raw["id"] for raw in changed if raw["id"] not in previous_objects]
+            order = list(by_id)
+            self._write(
+                DELTA,
+                {
+                    "move": move,
+                    "board": {
+                        key: value
+                        for key, value in data.items()
+                        if key != "game_objects" and previous.get(key) != value
+                    },
+                    "removed": removed,
+                    "objects": changed,
+                    "order": None if order == expected else order,
+                },
+            )
+        self._previous = data
+        self._previous_objects = by_id
+        self.snapshots += 1
+
+    def close(self):
+        self.file.close()
+
+
+def _frames(f: BinaryIO) -> Iterator[Tuple[int, bytes]]:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a board recording")
+    while True:
+        header = f.read(_FRAME.size)
+        if len(header) < _FRAME.size:
+            return
+        kind, length = _FRAME.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length:
+            # Cut off mid frame, e.g. the bot was killed while writing
+            return
+        yield kind, payload
+
+
+def read_recording(path: str) -> Iterator[Tuple[dict, dict, Optional[str]]]:
+    """
+    (session, board dict, move) for every recorded snapshot in order. The
+    board dicts are rebuilt in full, objects that did not change are the
+    same dicts as in the snapshot before.
+    """
+    session: dict = {}
+    unpacker = _Unpacker()
+    data: Optional[dict] = None
+    objects: Dict[int, dict] = {}
+    with open(path, "rb") as f:
+        for kind, payload in _frames(f):
+            if kind == SESSION:
+                unpacker = _Unpacker()
+                session, _ = unpacker.unpack(payload)
+                data = None
+                continue
+            frame, _ = unpacker.unpack(payload)
+            if kind == FULL:
+                data = frame["board"]
+                objects = {raw["id"]: raw for raw in data.get("game_objects") or []}
+            elif kind == DELTA and data is not None:
+                objects = dict(objects)
+                for object_id in frame["removed"]:
+                    del objects[object_id]
+                for raw in frame["objects"]:
+                    objects[raw["id"]] = raw
+                if frame["order"] is not None:
+                    objects = {i: objects[i] for i in frame["order"]}
+                data = dict(data, **frame["board"], game_objects=list(objects.values()))
+            else:
+                continue
+            yield session, data, frame["move"]
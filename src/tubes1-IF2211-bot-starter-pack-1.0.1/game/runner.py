@@ -0,0 +1,149 @@
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Type, Union
+
+from colorama import Fore, Style
+from game.async_api import AsyncApi
+from game.async_driver import play
+from game.board_handler import AsyncBoardHandler
+from game.board_state import BoardStateStore
+from game.bot_handler import AsyncBotHandler
+from game.instrumentation import DecisionStats, InstrumentedLogic
+from game.logic.base import BaseLogic
+from game.pacing import MovePacer
+
+
+@dataclass
+class BotConfig:
+    logic: str
+    token: Optional[str] = None
+    name: Optional[str] = None
+    email: Optional[str] = None
+    password: Optional[str] = None
+    team: Optional[str] = None
+    board: Optional[int] = None
+
+
+def load_config(path: str) -> List[BotConfig]:
+    """
+    Read bot definitions from a JSON file of the form
+    {"board": 1, "bots": [{"logic": "greedy12", "name": ..., "email": ...,
+    "password": ..., "team": ...}, {"logic": "Random", "token": ...}]}.
+    A top level "board" is used for every bot that does not set its own.
+    """
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {"bots": data}
+    default_board = data.get("board")
+    configs = []
+    for entry in data["bots"]:
+        config = BotConfig(**entry)
+        if config.board is None:
+            config.board = default_board
+        configs.append(config)
+    return configs
+
+
+def _log(name: str, message: str):
+    print(Style.BRIGHT + "[{}] ".format(name) + Style.RESET_ALL + message)
+
+
+def _error(name: str, message: str):
+    _log(name, Fore.RED + Style.BRIGHT + "Error: " + Style.RESET_ALL + message)
+
+
+async def run_bot(
+    api: AsyncApi,
+    config: BotConfig,
+    logic_class: Type[BaseLogic],
+    time_factor: float = 1,
+    stats: Optional[DecisionStats] = None,
+) -> Optional[MovePacer]:
+    """
+    Register or recover, join and play one bot. Returns the pacer of the
+    finished session, or None if the bot never got to play. With `stats` every
+    next_move call is measured into it.
+    """
+    bot_handler = AsyncBotHandler(api)
+    board_handler = AsyncBoardHandler(api)
+    label = config.name or config.token
+
+    token = config.token
+    if not token:
+        token = await bot_handler.recover(config.email, config.password)
+        if not token:
+            bot = await bot_handler.register(
+                config.name, config.email, config.password, config.team
+            )
+            if not bot:
+                _error(label, "Unable to register bot")
+                return None
+            _log(label, "Bot registered. Token: {}".format(bot.id))
+            token = bot.id
+
+    bot = await bot_handler.get_my_info(token)
+    if not bot or not bot.name:
+        _error(label, "Bot does not exist")
+        return None
+    label = bot.name
+    if stats:
+        stats.bot = bot.name
+
+    board_id = int(config.board) if config.board else None
+    if board_id:
+        if not await bot_handler.join(bot.id, board_id):
+            board_id = None
+    else:
+        for board in await board_handler.list_boards() or []:
+            if await bot_handler.join(bot.id, board.id):
+                board_id = board.id
+                break
+    if not board_id:
+        _error(label, "Unable to find any boards to join")
+        return None
+
+    # Each response is decoded against the previous one, see board.changes
+    store = BoardStateStore()
+    board = await board_handler.get_board(board_id, store)
+    if not board:
+        _error(label, "Unable to read board {}".format(board_id))
+        return None
+    pacer = MovePacer(board.minimum_delay_between_moves, time_factor)
+    _log(label, "Playing on board {} with {}".format(board_id, config.logic))
+    bot_logic = logic_class()
+    if stats:
+        bot_logic = InstrumentedLogic(bot_logic, stats)
+    await play(
+        bot_handler, board_handler, bot, board_id, bot_logic, pacer, store=store, board=board
+    )
+    return pacer
+
+
+async def run_bots(
+    api: AsyncApi,
+    configs: List[BotConfig],
+    controllers: Dict[str, Type[BaseLogic]],
+    time_factor: float = 1,
+    stats: Optional[List[DecisionStats]] = None,
+) -> List[Union[MovePacer, BaseException, None]]:
+    """
+    Play all configured bots concurrently on one event loop, sharing the
+    connection pool of `api`. A bot that crashes does not stop the others,
+    its exception is returned in place of its pacer. `stats`, if given, holds
+    one DecisionStats per config.
+    """
+    return await asyncio.gather(
+        *(
+            run_bot(
+                api,
+                config,
+                controllers[config.logic],
+                time_factor,
+                stats[index] if stats else None,
+            )
+            for index, config in enumerate(configs)
+        ),
+        return_exceptions=True,
+    )
@@ -0,0 +1,397 @@
+"""
+Headless in-process Diamonds game for local testing and benchmarking of the
+logic modules, without the Node game engine or a network.
+
+The rules follow the game engine: diamonds and red diamonds (2 points, 2
+inventory slots) regenerate when all are taken, the diamond button clears and
+regenerates them, teleporters come in pairs and are relocated periodically,
+diamonds are delivered by entering the own base, and a bot that can tackle
+steals the diamonds of the bot it walks into and sends it home.
+
+Time is simulated: every tick each bot gets one move (in a rotating order)
+and the clock advances by `minimum_delay_between_moves`.
+"""
+import random
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+from game.board_state import BoardStateStore
+from game.logic.base import BaseLogic
+from game.models import (
+    Base,
+    Board,
+    Bot,
+    Config,
+    Feature,
+    GameObject,
+    Position,
+    Properties,
+)
+
+
+@dataclass
+class SimulatorConfig:
+    width: int = 15
+    height: int = 15
+    minimum_delay_between_moves: int = 100
+    session_length: int = 60
+    inventory_size: int = 5
+    can_tackle: bool = True
+    teleporter_pairs: int = 1
+    teleport_relocation: int = 30
+    generation_ratio: float = 0.1
+    min_ratio_for_generation: float = 0.01
+    red_ratio: float = 0.2
+    seed: Optional[int] = None
+
+
+@dataclass(slots=True)
+class _Object:
+    id: int
+    type: str
+    x: int
+    y: int
+    points: int = 0
+    pair_id: Optional[str] = None
+    owner: Optional[str] = None
+
+
+@dataclass(slots=True)
+class _Bot:
+    id: int
+    name: str
+    token: str
+    x: int
+    y: int
+    base_x: int
+    base_y: int
+    inventory_size: int
+    can_tackle: bool
+    joined_at: int
+    diamonds: int = 0
+    score: int = 0
+    previous: Optional[Tuple[int, int]] = None
+
+
+@dataclass
+class BotResult:
+    name: str
+    score: int = 0
+    moves: int = 0
+    invalid_moves: int = 0
+    errors: int = 0
+    tackles: int = 0
+    decision_seconds: List[float] = field(default_factory=list)
+
+
+class Simulator:
+    def __init__(self, config: Optional[SimulatorConfig] = None):
+        self.config = config or SimulatorConfig()
+        self.random = random.Random(self.config.seed)
+        self.now = 0
+        self.next_id = 1
+        self.objects: List[_Object] = []
+        self.bots: Dict[str, _Bot] = {}
+        self.finished: Dict[str, _Bot] = {}
+        self.tackles: Dict[str, int] = {}
+        self.next_relocation = self.config.teleport_relocation * 1000
+        self._generate_button()
+        self._generate_diamonds()
+        self._generate_teleporters()
+
+    ###########################################################################
+    # Board setup
+    ###########################################################################
+    def _new_id(self) -> int:
+        self.next_id += 1
+        return self.next_id - 1
+
+    def _is_cell_empty(self, x: int, y: int) -> bool:
+        if any(o.x == x and o.y == y for o in self.objects):
+            return False
+        return not any(b.x == x and b.y == y for b in self.bots.values())
+
+    def _empty_position(self) -> Tuple[int, int]:
+        width, height = self.config.width, self.config.height
+        for _ in range(width * height):
+            x, y = self.random.randrange(width), self.random.randrange(height)
+            if self._is_cell_empty(x, y):
+                return x, y
+        for i in range(width * height):
+            x, y = i % width, i // width
+            if self._is_cell_empty(x, y):
+                return x, y
+        return 0, 0
+
+    def _generate_diamonds(self):
+        config = self.config
+        count = int(config.width * config.height * config.generation_ratio)
+        reds = int(count * config.red_ratio)
+        for i in range(count):
+            x, y = self._empty_position()
+            points = 2 if i < reds else 1
+            self.objects.append(
+                _Object(self._new_id(), "DiamondGameObject", x, y, points=points)
+            )
+
+    def _generate_button(self):
+        x, y = self._empty_position()
+        self.objects.append(_Object(self._new_id(), "DiamondButtonGameObject", x, y))
+
+    def _generate_teleporters(self):
+        for i in range(self.config.teleporter_pairs):
+            for _ in range(2):
+                x, y = self._empty_position()
+                self.objects.append(
+                    _Object(
+                        self._new_id(), "TeleportGameObject", x, y, pair_id=str(i + 1)
+                    )
+                )
+
+    def _relocate_teleporters(self):
+        for teleporter in self.objects:
+            if teleporter.type == "TeleportGameObject":
+                teleporter.x, teleporter.y = self._empty_position()
+
+    def join(self, name: str) -> Bot:
+        """Add a bot on a new base and start its session."""
+        x, y = self._empty_position()
+        bot = _Bot(
+            id=self._new_id(),
+            name=name,
+            token="sim-{}".format(name),
+            x=x,
+            y=y,
+            base_x=x,
+            base_y=y,
+            inventory_size=self.config.inventory_size,
+            can_tackle=self.config.can_tackle,
+            joined_at=self.now,
+        )
+        self.bots[name] = bot
+        self.objects.append(
+            _Object(self._new_id(), "BaseGameObject", x, y, owner=name)
+        )
+        return Bot(name=name, email="{}@simulator".format(name), id=bot.token)
+
+    def _remove_bot(self, bot: _Bot):
+        del self.bots[bot.name]
+        self.finished[bot.name] = bot
+        self.objects = [
+            o
+            for o in self.objects
+            if not (o.type == "BaseGameObject" and o.owner == bot.name)
+        ]
+
+    ###########################################################################
+    # Snapshots
+    ###########################################################################
+    def milliseconds_left(self, bot: _Bot) -> int:
+        return bot.joined_at + self.config.session_length * 1000 - self.now
+
+    def board(self) -> Board:
+        """A fresh Board snapshot of the current state."""
+        config = self.config
+        game_objects = []
+        for o in self.objects:
+            if o.type == "DiamondGameObject":
+                properties = Properties(points=o.points)
+            elif o.type == "TeleportGameObject":
+                properties = Properties(pair_id=o.pair_id)
+            elif o.type == "BaseGameObject":
+                properties = Properties(name=o.owner)
+            else:
+                properties = Properties()
+            game_objects.append(
+                GameObject(o.id, Position(y=o.y, x=o.x), o.type, properties)
+            )
+        for b in self.bots.values():
+            game_objects.append(
+                GameObject(
+                    b.id,
+                    Position(y=b.y, x=b.x),
+                    "BotGameObject",
+                    Properties(
+                        diamonds=b.diamonds,
+                        score=b.score,
+                        name=b.name,
+                        inventory_size=b.inventory_size,
+                        can_tackle=b.can_tackle,
+                        milliseconds_left=self.milliseconds_left(b),
+                        time_joined=str(b.joined_at),
+                        base=Base(y=b.base_y, x=b.base_x),
+                    ),
+                )
+            )
+        features = [
+            Feature("DiamondButtonProvider"),
+            Feature("BaseProvider"),
+            Feature(
+                "DiamondProvider",
+                Config(
+                    generation_ratio=config.generation_ratio,
+                    min_ratio_for_generation=config.min_ratio_for_generation,
+                    red_ratio=config.red_ratio,
+                ),
+            ),
+            Feature(
+                "BotProvider",
+                Config(
+                    inventory_size=config.inventory_size,
+                    can_tackle=config.can_tackle,
+                ),
+            ),
+            Feature("TeleportProvider", Config(pairs=config.teleporter_pairs)),
+            Feature(
+                "TeleportRelocationProvider",
+                Config(seconds=config.teleport_relocation),
+            ),
+        ]
+        return Board(
+            id=1,
+            width=config.width,
+            height=config.height,
+            features=features,
+            minimum_delay_between_moves=config.minimum_delay_between_moves,
+            game_objects=game_objects,
+        )
+
+    ###########################################################################
+    # Rules
+    ###########################################################################
+    def move(self, name: str, delta_x: int, delta_y: int) -> bool:
+        """Move a bot one step, returns False if the move was not legal."""
+        bot = self.bots[name]
+        if abs(delta_x) + abs(delta_y) != 1:
+            return False
+        x, y = bot.x + delta_x, bot.y + delta_y
+        if not (0 <= x < self.config.width and 0 <= y < self.config.height):
+            return False
+        # Another bot can only be entered by tackling it, or when it stands on
+        # our base, in which case it is sent home
+        for other in list(self.bots.values()):
+            if other is not bot and other.x == x and other.y == y:
+                if bot.can_tackle:
+                    continue
+                if bot.base_x == x and bot.base_y == y:
+                    other.x, other.y = other.base_x, other.base_y
+                    continue
+                return False
+        self._enter(bot, x, y)
+        return True
+
+    def _enter(self, bot: _Bot, x: int, y: int):
+        bot.previous = (bot.x, bot.y)
+        bot.x, bot.y = x, y
+        entered = [o for o in self.objects if o.x == x and o.y == y]
+        victims = [
+            b for b in self.bots.values() if b is not bot and b.x == x and b.y == y
+        ]
+        for victim in victims:
+            self._tackle(bot, victim)
+        for o in entered:
+            if o.type == "DiamondGameObject":
+                if any(g is o for g in self.objects) and bot.diamonds + o.points <= bot.inventory_size:
+                    bot.diamonds += o.points
+                    self.objects.remove(o)
+                    self._diamonds_removed()
+            elif o.type == "DiamondButtonGameObject":
+                if any(g is o for g in self.objects):
+                    self.objects = [
+                        g
+                        for g in self.objects
+                        if g.type not in ("DiamondButtonGameObject", "DiamondGameObject")
+                    ]
+                    self._generate_button()
+                    self._diamonds_removed()
+            elif o.type == "BaseGameObject":
+                if o.owner == bot.name:
+                    bot.score += bot.diamonds
+                    bot.diamonds = 0
+            elif o.type == "TeleportGameObject":
+                other = next(
+                    (
+                        t
+                        for t in self.objects
+                        if t.type == "TeleportGameObject"
+                        and t.pair_id == o.pair_id
+                        and t is not o
+                    ),
+                    None,
+                )
+                if other is None or bot.previous == (other.x, other.y):
+                    continue
+                self._enter(bot, other.x, other.y)
+                return
+
+    def _tackle(self, attacker: _Bot, victim: _Bot):
+        if not attacker.can_tackle:
+            return
+        victim.x, victim.y = victim.base_x, victim.base_y
+        stolen = min(victim.diamonds, attacker.inventory_size - attacker.diamonds)
+        victim.diamonds = max(victim.diamonds - stolen, 0)
+        attacker.diamonds += stolen
+        self.tackles[attacker.name] = self.tackles.get(attacker.name, 0) + 1
+
+    def _diamonds_removed(self):
+        if not any(o.type == "DiamondGameObject" for o in self.objects):
+            self._generate_diamonds()
+
+    def advance(self):
+        """Advance the clock by one move delay and end expired sessions."""
+        self.now += self.config.minimum_delay_between_moves
+        if self.config.teleport_relocation and self.now >= self.next_relocation:
+            self._relocate_teleporters()
+            self.next_relocation += self.config.teleport_relocation * 1000
+        for bot in list(self.bots.values()):
+            if self.milliseconds_left(bot) <= 0:
+                self._remove_bot(bot)
+
+    ###########################################################################
+    # Playing
+    ###########################################################################
+    def play(self, logics: Dict[str, BaseLogic]) -> Dict[str, BotResult]:
+        """
+        Join a bot for every entry of `logics` (name -> logic) and play until
+        all sessions have ended. Every tick each bot decides on the same
+        snapshot, then the moves are applied in a rotating order. A logic that
+        raises or returns an illegal move does not move that tick.
+        """
+        players = {name: self.join(name) for name in logics}
+        results = {name: BotResult(name) for name in logics}
+        names = list(logics)
+        store = BoardStateStore()
+        tick = 0
+        while self.bots:
+            board = self.board()
+            store.update(board)
+            moves = {}
+            for name in names:
+                player = players[name]
+                board_bot = board.get_bot(player)
+                if board_bot is None:
+                    continue
+                start = perf_counter()
+                try:
+                    moves[name] = logics[name].next_move(board_bot, board)
+                except Exception:
+                    results[name].errors += 1
+                    continue
+                finally:
+                    results[name].decision_seconds.append(perf_counter() - start)
+            offset = tick % len(names)
+            for name in names[offset:] + names[:offset]:
+                if name not in moves or name not in self.bots:
+                    continue
+                delta_x, delta_y = moves[name]
+                if self.move(name, delta_x, delta_y):
+                    results[name].moves += 1
+                else:
+                    results[name].invalid_moves += 1
+            self.advance()
+            tick += 1
+        for name, result in results.items():
+            result.score = self.finished[name].score
+            result.tackles = self.tackles.get(name, 0)
+        return results
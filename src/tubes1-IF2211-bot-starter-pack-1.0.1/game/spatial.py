@@ -0,0 +1,128 @@
+from itertools import accumulate
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+def _summed_area(width: int, height: int, cells: Iterable[Tuple[int, int, int]]) -> List[int]:
+    """
+    Summed-area table of a width x height grid, flattened with a leading zero
+    row and column: entry (y + 1) * (width + 1) + (x + 1) is the sum of all
+    values in the rectangle from (0, 0) to (x, y).
+    """
+    rows = {}
+    for x, y, value in cells:
+        if 0 <= x < width and 0 <= y < height:
+            row = rows.get(y)
+            if row is None:
+                row = rows[y] = [0] * (width + 1)
+            row[x + 1] += value
+    above = [0] * (width + 1)
+    table = list(above)
+    for y in range(height):
+        row = rows.get(y)
+        if row is not None:
+            above = [a + b for a, b in zip(above, accumulate(row))]
+        table += above
+    return table
+
+
+def _rectangle_sum(
+    table: List[int], width: int, height: int, x0: int, y0: int, x1: int, y1: int
+) -> int:
+    x0, y0 = max(x0, 0), max(y0, 0)
+    x1, y1 = min(x1, width - 1), min(y1, height - 1)
+    if x0 > x1 or y0 > y1:
+        return 0
+    stride = width + 1
+    return (
+        table[(y1 + 1) * stride + x1 + 1]
+        - table[y0 * stride + x1 + 1]
+        - table[(y1 + 1) * stride + x0]
+        + table[y0 * stride + x0]
+    )
+
+
+def cells_within(
+    x: int, y: int, radius: int, width: int, height: int
+) -> Iterator[Tuple[int, int]]:
+    """All cells of the board within Manhattan distance `radius` of (x, y)."""
+    for dy in range(-radius, radius + 1):
+        cy = y + dy
+        if not 0 <= cy < height:
+            continue
+        span = radius - abs(dy)
+        for cx in range(max(x - span, 0), min(x + span, width - 1) + 1):
+            yield cx, cy
+
+
+class DiamondDensity:
+    """
+    Summed-area tables of the blue and red diamonds of a board, answering
+    "how many diamonds within radius r of (x, y)" in O(1) after an O(W*H)
+    build. Square (Chebyshev) windows use a table over the board itself,
+    Manhattan windows use a table over the board rotated by 45 degrees,
+    where the Manhattan ball becomes a square. Each table is built on the
+    first query that needs it.
+
+    A diamond is red when its points are 2, every other diamond counts as
+    blue, the same split the logic modules use.
+    """
+
+    def __init__(self, width: int, height: int, diamonds: Iterable):
+        self.width = width
+        self.height = height
+        self._blue: List[Tuple[int, int]] = []
+        self._red: List[Tuple[int, int]] = []
+        for diamond in diamonds:
+            cell = (diamond.position.x, diamond.position.y)
+            props = diamond.properties
+            if props is not None and props.points == 2:
+                self._red.append(cell)
+            else:
+                self._blue.append(cell)
+        self._square: Optional[Tuple[List[int], List[int]]] = None
+        self._rotated: Optional[Tuple[List[int], List[int]]] = None
+
+    @classmethod
+    def for_diamonds(cls, board, diamonds: List) -> "DiamondDensity":
+        """The board's shared density if `diamonds` are all its diamonds."""
+        if diamonds is board.diamonds:
+            return board.density
+        return cls(board.width, board.height, diamonds)
+
+    def _square_tables(self) -> Tuple[List[int], List[int]]:
+        if self._square is None:
+            self._square = tuple(
+                _summed_area(self.width, self.height, ((x, y, 1) for x, y in cells))
+                for cells in (self._blue, self._red)
+            )
+        return self._square
+
+    def _rotated_tables(self) -> Tuple[List[int], List[int]]:
+        if self._rotated is None:
+            size = self.width + self.height - 1
+            offset = self.height - 1
+            self._rotated = tuple(
+                _summed_area(size, size, ((x + y, x - y + offset, 1) for x, y in cells))
+                for cells in (self._blue, self._red)
+            )
+        return self._rotated
+
+    def square(self, x: int, y: int, radius: int) -> Tuple[int, int]:
+        """(blue, red) diamonds with |dx| <= radius and |dy| <= radius."""
+        blue, red = self._square_tables()
+        bounds = (x - radius, y - radius, x + radius, y + radius)
+        return (
+            _rectangle_sum(blue, self.width, self.height, *bounds),
+            _rectangle_sum(red, self.width, self.height, *bounds),
+        )
+
+    def manhattan(self, x: int, y: int, radius: int) -> Tuple[int, int]:
+        """(blue, red) diamonds with |dx| + |dy| <= radius."""
+        blue, red = self._rotated_tables()
+        size = self.width + self.height - 1
+        u, v = x + y, x - y + self.height - 1
+        bounds = (u - radius, v - radius, u + radius, v + radius)
+        return (
+            _rectangle_sum(blue, size, size, *bounds),
+            _rectangle_sum(red, size, size, *bounds),
+        )
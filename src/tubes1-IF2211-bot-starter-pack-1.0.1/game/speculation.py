@@ -0,0 +1,229 @@
+import copy
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from threading import Event
+from typing import Dict, Optional, Tuple
+
+from game.logic.base import BaseLogic
+from game.models import Board, ChangeSet, GameObject, Position, _index_of
+
+
+def _same(predicted: GameObject, actual: GameObject) -> bool:
+    """Equal apart from milliseconds_left, which the server counts down."""
+    if predicted.type != actual.type or predicted.position != actual.position:
+        return False
+    a, b = predicted.properties, actual.properties
+    if a is None or b is None:
+        return a is b
+    return replace(a, milliseconds_left=None) == replace(b, milliseconds_left=None)
+
+
+def predict(
+    board: Board, board_bot: GameObject, move: Tuple[int, int]
+) -> Optional[Tuple[Board, GameObject, Dict[int, Optional[GameObject]]]]:
+    """
+    The board expected after `move`, if it succeeds and nothing else changes:
+    (board, our bot on it, id -> predicted object or None if removed). The
+    bot walks through a teleporter, picks up a diamond it has room for and
+    delivers at its own base, as the game engine does, and its session has one
+    move delay less left. Moves whose outcome
+    depends on more than that (tackles, the diamond button, taking the last
+    diamond which makes the board regenerate) are not predicted.
+    """
+    x, y = board_bot.position.x + move[0], board_bot.position.y + move[1]
+    if not (0 <= x < board.width and 0 <= y < board.height):
+        return None
+    entered = board.objects_at(x, y)
+    if any(o.type in ("BotGameObject", "DiamondButtonGameObject") for o in entered):
+        return None
+    teleporter = next((o for o in entered if o.type == "TeleportGameObject"), None)
+    if teleporter is not None:
+        exit_ = next(
+            (
+                t
+                for t in board.teleporters
+                if t is not teleporter and t.properties.pair_id == teleporter.properties.pair_id
+            ),
+            None,
+        )
+        if exit_ is not None:
+            x, y = exit_.position.x, exit_.position.y
+            entered = board.objects_at(x, y)
+            if any(o.type != "TeleportGameObject" for o in entered):
+                return None
+
+    props = board_bot.properties
+    diamonds, score = props.diamonds, props.score
+    milliseconds_left = props.milliseconds_left
+    if milliseconds_left is not None:
+        # The response comes about one move delay later
+        milliseconds_left -= board.minimum_delay_between_moves
+    removed = []
+    for obj in entered:
+        if obj.type == "DiamondGameObject":
+            points = obj.properties.points
+            if diamonds + points <= props.inventory_size:
+                if len(board.diamonds) == 1:
+                    return None
+                diamonds += points
+                removed.append(obj)
+        elif obj.type == "BaseGameObject" and obj.properties.name == props.name:
+            score += diamonds
+            diamonds = 0
+
+    moved = GameObject(
+        board_bot.id,
+        Position(y, x),
+        board_bot.type,
+        replace(
+            props, diamonds=diamonds, score=score, milliseconds_left=milliseconds_left
+        ),
+    )
+    game_objects = list(board.game_objects)
+    game_objects[_index_of(game_objects, board_bot)] = moved
+    for obj in removed:
+        del game_objects[_index_of(game_objects, obj)]
+    predicted = Board(
+        board.id,
+        board.width,
+        board.height,
+        board.features,
+        board.minimum_delay_between_moves,
+        game_objects,
+    )
+    changes = ChangeSet(removed=removed, moved=[(board_bot, moved)])
+    predicted._update_indexes(board, changes)
+    predicted.changes = changes
+    expected = {board_bot.id: moved}
+    expected.update((obj.id, None) for obj in removed)
+    return predicted, moved, expected
+
+
+def matches(board: Board, expected: Dict[int, Optional[GameObject]]) -> bool:
+    """
+    Whether `board` is the predicted one. Its changes since the board the
+    prediction was made from must be exactly the expected ones, other bots
+    may only have a different milliseconds_left.
+    """
+    changes = board.changes
+    if changes is None or changes.full or changes.added:
+        return False
+    seen = 0
+    for obj in changes.removed:
+        if obj.id not in expected or expected[obj.id] is not None:
+            return False
+        seen += 1
+    for before, after in changes.moved + changes.changed:
+        if after.id in expected:
+            predicted = expected[after.id]
+            if predicted is None or not _same(predicted, after):
+                return False
+            seen += 1
+        elif after.type != "BotGameObject" or not _same(before, after):
+            return False
+    return seen == len(expected)
+
+
+@dataclass(slots=True)
+class _Speculation:
+    future: Optional[Future] = None
+    # Filled in by the worker before it starts deciding, then `ready` is set
+    expected: Optional[Dict[int, Optional[GameObject]]] = None
+    logic: Optional[BaseLogic] = None
+    ready: Event = field(default_factory=Event)
+
+
+class SpeculativePlanner(BaseLogic):
+    """
+    Runs a logic's next_move for the board expected after our move while the
+    move request is on the network (see `predict`), in a worker thread on a
+    copy of the logic. When the response matches the prediction, the copy,
+    which has already decided for that board, takes the place of the logic
+    and its move is used right away. Otherwise the copy is dropped and the
+    logic decides as usual. The milliseconds_left of a response is not
+    compared, so a speculative decision may see our bot's off by the network
+    jitter.
+
+    `speculate` only hands the work to the worker, the prediction and the
+    copy of the logic are made there so the move request is not held up.
+    next_move waits for the copy to be made before it uses the logic again.
+
+    Like InstrumentedLogic it stands in for the logic: other attributes are
+    looked up on the logic in use.
+    """
+
+    def __init__(self, logic: BaseLogic):
+        self.logic = logic
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculation")
+        self.pending: Optional[_Speculation] = None
+        self.ticks = 0
+        self.speculations = 0
+        self.hits = 0
+
+    def __getattr__(self, name):
+        if name == "logic":
+            # Not set yet, e.g. while being copied
+            raise AttributeError(name)
+        return getattr(self.logic, name)
+
+    def speculate(self, board_bot: GameObject, board: Board, move: Tuple[int, int]):
+        """Start deciding for the board expected after `move` in the background."""
+        self.cancel()
+        speculation = _Speculation()
+        speculation.future = self.executor.submit(
+            self._run, speculation, board_bot, board, move
+        )
+        self.pending = speculation
+
+    def _run(
+        self,
+        speculation: _Speculation,
+        board_bot: GameObject,
+        board: Board,
+        move: Tuple[int, int],
+    ) -> Optional[Tuple[int, int]]:
+        try:
+            prediction = predict(board, board_bot, move)
+            if prediction is None:
+                return None
+            predicted, predicted_bot, speculation.expected = prediction
+            # The copy shares the board it was handed, not a copy of it
+            speculation.logic = copy.deepcopy(self.logic, {id(board): board})
+        finally:
+            speculation.ready.set()
+        return speculation.logic.next_move(predicted_bot, predicted)
+
+    def cancel(self):
+        if self.pending is not None:
+            self.pending.future.cancel()
+            self.pending = None
+
+    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        self.ticks += 1
+        speculation, self.pending = self.pending, None
+        if speculation is not None:
+            # The worker may still be copying the logic
+            speculation.ready.wait()
+            if speculation.expected is not None:
+                self.speculations += 1
+                if matches(board, speculation.expected) and speculation.future.exception() is None:
+                    self.logic = speculation.logic
+                    self.hits += 1
+                    return speculation.future.result()
+            speculation.future.cancel()
+        return self.logic.next_move(board_bot, board)
+
+    def refine(self, until: float) -> bool:
+        return self.logic.refine(until)
+
+    def close(self):
+        self.cancel()
+        self.executor.shutdown()
+
+    def stats(self) -> dict:
+        return {
+            "ticks": self.ticks,
+            "speculations": self.speculations,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.speculations if self.speculations else 0.0,
+        }
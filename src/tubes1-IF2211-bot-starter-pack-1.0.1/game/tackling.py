@@ -0,0 +1,179 @@
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from game.models import Board, GameObject
+
+# Positions kept per bot
+TRAIL_LENGTH = 8
+# Bots further than this from a cell cannot tackle a bot on it next tick, nor
+# be tackled from it
+TACKLE_REACH = 2
+
+Cell = Tuple[int, int]
+
+
+@dataclass(slots=True)
+class Track:
+    """The latest snapshot of one bot and the cells it was seen on, oldest first."""
+
+    bot: GameObject
+    trail: Deque[Cell] = field(default_factory=lambda: deque(maxlen=TRAIL_LENGTH))
+    # Last single step, (0, 0) after standing still, a teleporter or being sent home
+    step: Cell = (0, 0)
+    # Tick of the last step
+    moved_at: int = -1
+
+    @property
+    def cell(self) -> Cell:
+        return self.bot.position.x, self.bot.position.y
+
+
+@dataclass(slots=True)
+class TackleOpportunity:
+    victim: GameObject
+    # Cell to step on, next to the bot
+    cell: Cell
+    # Diamonds the tackle would take
+    gain: int
+
+
+class TackleTracker:
+    """
+    Follows every bot from snapshot to snapshot to find tackles to make and
+    to stay out of.
+
+    A tackle is walking into another bot's cell, which sends it to its base
+    and hands over its diamonds, as many as fit in the attacker's inventory
+    (see the game engine's BotGameObject). Bots are expected to keep going
+    the way they went last tick and to stay put otherwise.
+
+    `update` must see every snapshot in order. It only touches the bots in
+    board.changes, and the queries only look at the cells within
+    TACKLE_REACH of a cell, so the cost per tick stays the same however many
+    bots play. A board without changes is tracked from scratch.
+    """
+
+    def __init__(self):
+        self.tracks: Dict[int, Track] = {}
+        # Cell -> ids of the bots on it
+        self.cells: Dict[Cell, Set[int]] = {}
+        self.tick = 0
+
+    def update(self, board: Board):
+        self.tick += 1
+        changes = board.changes
+        if changes is None or changes.full:
+            self.tracks, self.cells = {}, {}
+            for bot in board.bots:
+                self._add(bot)
+            return
+        for obj in changes.removed:
+            if obj.type == "BotGameObject":
+                self._remove(obj.id)
+        for before, after in changes.moved + changes.changed:
+            if after.type == "BotGameObject":
+                self._move(before, after)
+        for obj in changes.added:
+            if obj.type == "BotGameObject":
+                self._add(obj)
+
+    def _add(self, bot: GameObject):
+        track = Track(bot)
+        track.trail.append(track.cell)
+        self.tracks[bot.id] = track
+        self.cells.setdefault(track.cell, set()).add(bot.id)
+
+    def _remove(self, bot_id: int):
+        track = self.tracks.pop(bot_id, None)
+        if track is not None:
+            ids = self.cells[track.cell]
+            ids.discard(bot_id)
+            if not ids:
+                del self.cells[track.cell]
+
+    def _move(self, before: GameObject, after: GameObject):
+        track = self.tracks.get(after.id)
+        if track is None:
+            self._add(after)
+            return
+        old = track.cell
+        track.bot = after
+        new = track.cell
+        if new == old:
+            return
+        ids = self.cells[old]
+        ids.discard(after.id)
+        if not ids:
+            del self.cells[old]
+        self.cells.setdefault(new, set()).add(after.id)
+        step = (new[0] - old[0], new[1] - old[1])
+        track.step = step if abs(step[0]) + abs(step[1]) == 1 else (0, 0)
+        track.moved_at = self.tick
+        track.trail.append(new)
+
+    def predict(self, bot_id: int) -> Optional[Cell]:
+        """The cell a bot is expected on next tick."""
+        track = self.tracks.get(bot_id)
+        if track is None:
+            return None
+        x, y = track.cell
+        if track.moved_at != self.tick:
+            return x, y
+        return x + track.step[0], y + track.step[1]
+
+    def near(self, x: int, y: int, reach: int = TACKLE_REACH) -> List[Track]:
+        """Tracks of the bots within `reach` steps of (x, y), without teleporters."""
+        found = []
+        for dy in range(-reach, reach + 1):
+            span = reach - abs(dy)
+            for dx in range(-span, span + 1):
+                for bot_id in self.cells.get((x + dx, y + dy), ()):
+                    found.append(self.tracks[bot_id])
+        return found
+
+    def opportunities(self, board_bot: GameObject) -> List[TackleOpportunity]:
+        """
+        Tackles board_bot can make with its next move, most diamonds first: on
+        a loaded bot expected on a cell next to it.
+        """
+        props = board_bot.properties
+        room = props.inventory_size - props.diamonds
+        if not props.can_tackle or room <= 0:
+            return []
+        x, y = board_bot.position.x, board_bot.position.y
+        found = []
+        for track in self.near(x, y):
+            victim = track.bot
+            if victim.id == board_bot.id or not victim.properties.diamonds:
+                continue
+            cell = self.predict(victim.id)
+            if abs(cell[0] - x) + abs(cell[1] - y) == 1:
+                found.append(TackleOpportunity(victim, cell, min(victim.properties.diamonds, room)))
+        found.sort(key=lambda o: -o.gain)
+        return found
+
+    def threat(self, board_bot: GameObject, x: int, y: int) -> int:
+        """
+        Diamonds board_bot may lose to a tackle on (x, y) next tick: from a bot
+        that can tackle, has room and is expected to step there, or stands
+        next to it and has not been moving.
+        """
+        carrying = board_bot.properties.diamonds
+        if not carrying:
+            return 0
+        risk = 0
+        for track in self.near(x, y):
+            attacker = track.bot
+            props = attacker.properties
+            if attacker.id == board_bot.id or not props.can_tackle:
+                continue
+            room = props.inventory_size - props.diamonds
+            if room <= 0:
+                continue
+            ax, ay = track.cell
+            predicted = self.predict(attacker.id)
+            still = predicted == (ax, ay)
+            if predicted == (x, y) or still and abs(ax - x) + abs(ay - y) == 1:
+                risk = max(risk, min(carrying, room))
+        return risk
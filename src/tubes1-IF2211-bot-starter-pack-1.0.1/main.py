@@ -1,29 +1,26 @@
 import argparse
-from time import sleep
+import asyncio
 
 from colorama import Back, Fore, Style, init
 from game.api import Api
-from game.board_handler import BoardHandler
-from game.bot_handler import BotHandler
-from game.logic.random import RandomLogic
+from game.async_api import AsyncApi
+from game.async_driver import play
+from game.board_handler import AsyncBoardHandler, BoardHandler
+from game.board_state import BoardStateStore
+from game.bot_handler import AsyncBotHandler, BotHandler
+from game.pacing import MovePacer
+from game.profiling import NO_PHASE, PhaseProfiler
+from game.recording import BoardRecorder
+from game.runner import load_config, run_bots
+from game.speculation import SpeculativePlanner
+from game.controllers import CONTROLLERS
+from game.instrumentation import DecisionStats, InstrumentedLogic, write_stats
 from game.util import *
-from game.logic.random import RandomLogic
-from game.logic.astarbot import AStarBot
-from game.logic.greedy12 import greedy12 
-from game.logic.greedyredwork import greedyred 
-from game.logic.original10 import original
 from game.logic.base import BaseLogic
 
 init()
 BASE_URL = "http://localhost:3000/api"
 DEFAULT_BOARD_ID = 1
-CONTROLLERS = {
-    "Random": RandomLogic,
-    "mybot": AStarBot,
-    "greedy12": greedy12,
-    "greedyred": greedyred, 
-    "original": original, 
-}
 
 ###############################################################################
 #
@@ -38,6 +35,11 @@ group.add_argument(
     action="store",
 )
 group.add_argument("--name", help="The name of the bot to register", action="store")
+group.add_argument(
+    "--config",
+    help="A JSON file with several bots (logic and credentials or token) to run concurrently in this process",
+    action="store",
+)
 parser.add_argument("--email", help="The email of the bot to register", action="store")
 parser.add_argument(
     "--password", help="The password of the bot to register", action="store"
@@ -50,6 +52,7 @@ parser.add_argument(
     "--time-factor",
     help="A factor to multiply each move command with. If you want to run the bot in a slower mode e.g. use --time-factor=5 to multiply each delay with 5.",
     default=1,
+    type=float,
     action="store",
 )
 parser.add_argument(
@@ -59,17 +62,133 @@ parser.add_argument(
     ),
     action="store",
 )
+parser.add_argument(
+    "--async",
+    help="Play the game on an asyncio event loop, scheduling each move against the board's minimum delay between moves",
+    dest="use_async",
+    action="store_true",
+)
+parser.add_argument(
+    "--stats",
+    help="Measure every next_move call (latency percentiles, objects per board, allocated blocks) and write them as JSON to this file at game over",
+    action="store",
+)
+parser.add_argument(
+    "--profile",
+    help="Profile the game loop split into http, decode, from_dict, next_move, refine and sleep, and write PREFIX.pstats and PREFIX.collapsed (flamegraph stacks) at game over. Default prefix: profile",
+    metavar="PREFIX",
+    nargs="?",
+    const="profile",
+    action="store",
+)
+parser.add_argument(
+    "--record",
+    help="Append every board snapshot received to this file, in a compact binary log that replay.py plays back offline",
+    metavar="FILE",
+    action="store",
+)
+parser.add_argument(
+    "--speculate",
+    help="While a move is on the network, compute the next move in a background thread for the board expected if the move succeeds and nothing else changes, and use it when the response matches",
+    action="store_true",
+)
 group = parser.add_argument_group("API connection")
 group.add_argument(
     "--host", action="store", default=BASE_URL, help="Default: {}".format(BASE_URL)
 )
+group.add_argument(
+    "--pool-size",
+    help="Number of keep-alive connections kept open to the server. Default: 10",
+    default=10,
+    type=int,
+    action="store",
+)
+group.add_argument(
+    "--retries",
+    help="Number of retries when a connection to the server fails. Default: 3",
+    default=3,
+    type=int,
+    action="store",
+)
+group.add_argument(
+    "--timeout",
+    help="Seconds to wait for the server to respond to a request. Default: 5",
+    default=5.0,
+    type=float,
+    action="store",
+)
 args = parser.parse_args()
+if args.profile and args.config:
+    parser.error("--profile profiles a single bot and cannot be used with --config")
+if args.record and args.config:
+    parser.error("--record records a single bot and cannot be used with --config")
+if args.speculate and args.config:
+    parser.error("--speculate runs a single bot and cannot be used with --config")
 
-time_factor = int(args.time_factor)
-api = Api(args.host)
+time_factor = args.time_factor
+api = Api(
+    args.host,
+    pool_size=args.pool_size,
+    retries=args.retries,
+    read_timeout=args.timeout,
+)
 bot_handler = BotHandler(api)
 board_handler = BoardHandler(api)
 
+###############################################################################
+#
+# Run every bot from a config file in this process over one connection pool
+#
+###############################################################################
+if args.config:
+    configs = load_config(args.config)
+    for config in configs:
+        if config.board is None:
+            config.board = args.board
+    invalid = [c.logic for c in configs if c.logic not in CONTROLLERS]
+    if invalid:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + "Error: "
+            + Style.RESET_ALL
+            + "Invalid logic controller: {}".format(", ".join(invalid))
+        )
+        exit(1)
+    api.close()
+    api = Api(
+        args.host,
+        pool_size=max(args.pool_size, len(configs)),
+        retries=args.retries,
+        read_timeout=args.timeout,
+    )
+    async_api = AsyncApi(api)
+    stats = [DecisionStats(c.logic, c.name) for c in configs] if args.stats else None
+    results = asyncio.run(
+        run_bots(async_api, configs, CONTROLLERS, time_factor, stats)
+    )
+    async_api.close()
+    print(Fore.BLUE + Style.BRIGHT + "Game over!" + Style.RESET_ALL)
+    for config, result in zip(configs, results):
+        name = config.name or config.token
+        if isinstance(result, MovePacer):
+            pace = result.stats()
+            print(
+                Style.BRIGHT + "{}:".format(name) + Style.RESET_ALL,
+                "{} of {} moves allowed by the rate limit ({:.0%})".format(
+                    pace["moves"], pace["max_moves"], pace["ratio"]
+                ),
+            )
+        elif isinstance(result, BaseException):
+            print(
+                Style.BRIGHT + "{}:".format(name) + Style.RESET_ALL,
+                Fore.RED + "crashed: {!r}".format(result) + Style.RESET_ALL,
+            )
+    if stats:
+        write_stats(args.stats, stats)
+        print(Style.BRIGHT + "Stats:" + Style.RESET_ALL, "written to", args.stats)
+    exit()
+
 ###############################################################################
 #
 # (Try and) Register a new bot if we have not supplied a token
@@ -123,6 +242,14 @@ print(Fore.BLUE + Style.BRIGHT + "Welcome back, " + Style.RESET_ALL + bot.name)
 # Setup variables
 logic_class = CONTROLLERS[logic_controller]
 bot_logic: BaseLogic = logic_class()
+speculator = None
+if args.speculate:
+    speculator = SpeculativePlanner(bot_logic)
+    bot_logic = speculator
+stats = None
+if args.stats:
+    stats = DecisionStats(logic_controller, bot.name)
+    bot_logic = InstrumentedLogic(bot_logic, stats)
 
 ###############################################################################
 #
@@ -167,52 +294,100 @@ if not current_board_id:
 # Prepare state from current board
 #
 ###############################################################################
-board = board_handler.get_board(current_board_id)
-move_delay = board.minimum_delay_between_moves / 1000
+recorder = None
+if args.record:
+    recorder = BoardRecorder(args.record)
+    recorder.start(bot=bot.name, logic=logic_controller, board=current_board_id)
+    api.recorder = recorder
+# Each response is decoded against the previous one, see board.changes
+store = BoardStateStore()
+board = board_handler.get_board(current_board_id, store)
+pacer = MovePacer(board.minimum_delay_between_moves, time_factor)
+profiler = None
+phase = lambda name: NO_PHASE
+if args.profile:
+    profiler = PhaseProfiler()
+    api.profiler = profiler
+    phase = profiler.phase
+    profiler.start()
 
 ###############################################################################
 #
 # Game play loop
 #
 ###############################################################################
-while True:
-    # Find our info among the bots on the board
-    board_bot = board.get_bot(bot)
-    if not board_bot:
-        # Managed to get game over
-        break
-
-    # Calculate next move
-    delta_x, delta_y = bot_logic.next_move(board_bot, board)
-    # delta_x, delta_y = (1, 0)
-    if not board.is_valid_move(board_bot.position, delta_x, delta_y):
-        print(
-            Fore.YELLOW + Style.BRIGHT + "Warn:" + Style.RESET_ALL,
-            "Invalid move will be ignored."
-            + f" Your move: ({delta_x}, {delta_y}). Your position: ({board_bot.position.x}, {board_bot.position.y})",
+if args.use_async:
+    async_api = AsyncApi(api)
+    asyncio.run(
+        play(
+            AsyncBotHandler(async_api),
+            AsyncBoardHandler(async_api),
+            bot,
+            current_board_id,
+            bot_logic,
+            pacer,
+            profiler,
+            refine=True,
+            speculator=speculator,
+            store=store,
+            board=board,
         )
-        sleep(1)
-        continue
+    )
+    async_api.executor.shutdown()
+else:
+    while True:
+        # Find our info among the bots on the board
+        board_bot = board.get_bot(bot)
+        if not board_bot:
+            # Managed to get game over
+            break
 
-    try:
-        # Try to perform move
-        board = bot_handler.move(bot.id, current_board_id, delta_x, delta_y)
-    except Exception as e:
-        break
+        # Calculate next move
+        with phase("next_move"):
+            delta_x, delta_y = bot_logic.next_move(board_bot, board)
+        # delta_x, delta_y = (1, 0)
+        if not board.is_valid_move(board_bot.position, delta_x, delta_y):
+            print(
+                Fore.YELLOW + Style.BRIGHT + "Warn:" + Style.RESET_ALL,
+                "Invalid move will be ignored."
+                + f" Your move: ({delta_x}, {delta_y}). Your position: ({board_bot.position.x}, {board_bot.position.y})",
+            )
+            pacer.skipped()
+            with phase("sleep"):
+                pacer.wait()
+            board = board_handler.get_board(current_board_id, store)
+            if not board:
+                break
+            continue
 
-    if not board:
-        # Read new board state
-        board = board_handler.get_board(current_board_id)
+        # Don't spam the board more than it allows! Planning that ran out of
+        # budget in next_move may go on until then
+        if pacer.next_move_at is not None:
+            with phase("refine"):
+                bot_logic.refine(pacer.next_move_at)
+        with phase("sleep"):
+            pacer.wait()
+        pacer.moved()
+        if speculator:
+            # Plan ahead for the response while the request is on the network
+            speculator.speculate(board_bot, board, (delta_x, delta_y))
+        try:
+            # Try to perform move
+            board = bot_handler.move(
+                bot.id, current_board_id, delta_x, delta_y, store
+            )
+        except Exception as e:
+            break
 
-    # Get new state
-    board_bot = board.get_bot(bot)
-    if not board_bot:
-        # Managed to get game over after move
-        break
+        if not board:
+            # Read new board state
+            board = board_handler.get_board(current_board_id, store)
 
-    # Don't spam the board more than it allows!
-    # sleep(move_delay * time_factor)
-    sleep(1)
+        # Get new state
+        board_bot = board.get_bot(bot)
+        if not board_bot:
+            # Managed to get game over after move
+            break
 
 
 ###############################################################################
@@ -220,4 +395,79 @@ while True:
 # Game over!
 #
 ###############################################################################
+if profiler:
+    profiler.stop()
 print(Fore.BLUE + Style.BRIGHT + "Game over!" + Style.RESET_ALL)
+pace = pacer.stats()
+print(
+    Style.BRIGHT + "Moves:" + Style.RESET_ALL,
+    "{} of {} allowed by the rate limit in {:.1f} s ({:.0%})".format(
+        pace["moves"], pace["max_moves"], pace["seconds"], pace["ratio"]
+    ),
+)
+if hasattr(bot_logic, "path_cache_stats"):
+    cache = bot_logic.path_cache_stats()
+    print(
+        Style.BRIGHT + "Path cache:" + Style.RESET_ALL,
+        "{} hits, {} misses ({:.0%} hit rate)".format(
+            cache["hits"], cache["misses"], cache["hit_rate"]
+        ),
+    )
+if speculator:
+    speculator.close()
+    speculation = speculator.stats()
+    print(
+        Style.BRIGHT + "Speculation:" + Style.RESET_ALL,
+        "{} of {} speculative moves used, {} moves not predicted ({:.0%} hit rate)".format(
+            speculation["hits"],
+            speculation["speculations"],
+            speculation["ticks"] - speculation["speculations"],
+            speculation["hit_rate"],
+        ),
+    )
+if hasattr(bot_logic, "budget_exceeded"):
+    print(
+        Style.BRIGHT + "Budget:" + Style.RESET_ALL,
+        "{} moves answered before planning finished ({:.0f} ms per move)".format(
+            bot_logic.budget_exceeded,
+            1000 * pacer.minimum_delay * bot_logic.budget_fraction,
+        ),
+    )
+summary = api.timing_summary()
+if summary["requests"]:
+    print(
+        Style.BRIGHT + "Requests:" + Style.RESET_ALL,
+        "{} sent, {} new connections ({:.0%} reused), wait {:.1f} ms avg / {:.1f} ms p95, transfer {:.1f} ms avg".format(
+            summary["requests"],
+            summary["new_connections"],
+            summary["reuse_ratio"],
+            summary["wait_ms_avg"],
+            summary["wait_ms_p95"],
+            summary["transfer_ms_avg"],
+        ),
+    )
+if stats:
+    print(Style.BRIGHT + "Decisions:" + Style.RESET_ALL, stats.summary())
+    write_stats(args.stats, [stats])
+    print(Style.BRIGHT + "Stats:" + Style.RESET_ALL, "written to", args.stats)
+if recorder:
+    recorder.close()
+    print(
+        Style.BRIGHT + "Recording:" + Style.RESET_ALL,
+        "{} snapshots ({} full), {:.1f} KB appended to {}".format(
+            recorder.snapshots,
+            recorder.full_snapshots,
+            recorder.bytes_written / 1024,
+            args.record,
+        ),
+    )
+if profiler:
+    print(Style.BRIGHT + "Phases:" + Style.RESET_ALL)
+    for line in profiler.summary(pace["moves"]):
+        print("   ", line)
+    print(
+        Style.BRIGHT + "Profile:" + Style.RESET_ALL,
+        "written to",
+        " and ".join(profiler.write(args.profile)),
+    )
+api.close()
@@ -0,0 +1,151 @@
+"""
+Play a game recorded with `main.py --record FILE` back into logic
+controllers, as fast as they decide, without a server.
+
+Every snapshot is decoded the way the live game loop does (against the
+previous one, see BoardStateStore) and handed to next_move of the recorded
+bot. The moves are compared with the ones the bot sent while recording,
+which is a regression test when replaying the logic that played the game.
+
+    python replay.py game.log
+    python replay.py game.log --logic greedy12 original --stats replay.json
+"""
+import argparse
+import random
+from time import perf_counter
+from typing import List, Optional
+
+from colorama import Fore, Style, init
+from game.board_state import BoardStateStore
+from game.bot_handler import BotHandler
+from game.controllers import CONTROLLERS
+from game.instrumentation import DecisionStats, InstrumentedLogic, write_stats
+from game.models import Bot
+from game.recording import read_recording
+
+
+def replay(
+    path: str,
+    logic: Optional[str] = None,
+    bot_name: Optional[str] = None,
+    stats: Optional[DecisionStats] = None,
+    seed: int = 0,
+) -> dict:
+    """
+    Replay every session of a recording into a new instance of `logic` (by
+    default the logic that was recorded), deciding for `bot_name` (by
+    default the recorded bot).
+    """
+    totals = {
+        "sessions": 0,
+        "snapshots": 0,
+        "decisions": 0,
+        "compared": 0,
+        "matched": 0,
+        "seconds": 0.0,
+    }
+    current = None
+    decided = None
+    start = perf_counter()
+    for session, data, move in read_recording(path):
+        if session is not current:
+            current = session
+            totals["sessions"] += 1
+            # RandomLogic draws from the global generator
+            random.seed(seed)
+            store = BoardStateStore()
+            bot_logic = CONTROLLERS[logic or session["logic"]]()
+            if stats is not None:
+                bot_logic = InstrumentedLogic(bot_logic, stats)
+            bot = Bot(name=bot_name or session["bot"], email="", id="")
+            decided = None
+        elif decided is not None and move is not None:
+            # This snapshot answered the move the bot sent for the one before
+            totals["compared"] += 1
+            totals["matched"] += decided == move
+        totals["snapshots"] += 1
+        board = store.decode(data)
+        board_bot = board.get_bot(bot)
+        decided = None
+        if board_bot is None:
+            continue
+        delta_x, delta_y = bot_logic.next_move(board_bot, board)
+        totals["decisions"] += 1
+        try:
+            decided = BotHandler._get_direction(delta_x, delta_y)
+        except Exception:
+            # Not a move the bot would have sent
+            decided = None
+    totals["seconds"] = perf_counter() - start
+    return totals
+
+
+def print_result(name: str, totals: dict, stats: Optional[DecisionStats]):
+    seconds = totals["seconds"] or 1e-9
+    print(
+        Style.BRIGHT + "{}:".format(name) + Style.RESET_ALL,
+        "{} snapshots in {} sessions, {:.2f} s, {:.0f} ticks/s".format(
+            totals["snapshots"],
+            totals["sessions"],
+            totals["seconds"],
+            totals["snapshots"] / seconds,
+        ),
+    )
+    if totals["compared"]:
+        print(
+            "    same move as recorded: {} of {} ({:.0%})".format(
+                totals["matched"],
+                totals["compared"],
+                totals["matched"] / totals["compared"],
+            )
+        )
+    if stats is not None:
+        print("    " + stats.summary())
+
+
+if __name__ == "__main__":
+    init()
+    parser = argparse.ArgumentParser(
+        description="Replay a game recorded with main.py --record into logic controllers"
+    )
+    parser.add_argument("recording", help="File written by main.py --record")
+    parser.add_argument(
+        "--logic",
+        help="Logic controllers to replay. Default: the recorded one of each session",
+        nargs="+",
+    )
+    parser.add_argument(
+        "--bot", help="Name of the bot to decide for. Default: the recorded bot"
+    )
+    parser.add_argument(
+        "--seed", help="Seed of the global random generator. Default: 0", default=0, type=int
+    )
+    parser.add_argument(
+        "--stats",
+        help="Measure every next_move call and write them as JSON to this file, like main.py --stats",
+        action="store",
+    )
+    args = parser.parse_args()
+
+    logics: List[Optional[str]] = args.logic or [None]
+    invalid = [name for name in logics if name is not None and name not in CONTROLLERS]
+    if invalid:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + "Error: "
+            + Style.RESET_ALL
+            + "Invalid logic controller: {}".format(", ".join(invalid))
+        )
+        exit(1)
+
+    all_stats = []
+    for name in logics:
+        stats = DecisionStats(name or "recorded", args.bot) if args.stats else None
+        totals = replay(args.recording, name, args.bot, stats, args.seed)
+        print_result(name or "recorded", totals, stats)
+        if stats is not None:
+            all_stats.append(stats)
+    if all_stats:
+        write_stats(args.stats, all_stats)
+        print(Style.BRIGHT + "Stats:" + Style.RESET_ALL, "written to", args.stats)
@@ -0,0 +1,247 @@
+"""
+Play the logic controllers against each other on the offline simulator.
+
+Every game is an independent simulation with its own seed, so games are spread
+over a process pool and the throughput grows with the number of cores. The
+result is a score table with 95% confidence intervals and the time each
+strategy spent deciding its moves.
+
+    python tournament.py --games 200
+    python tournament.py --games 500 --players 2 --logic greedy12 greedyred original
+"""
+import argparse
+import math
+import multiprocessing
+import random
+import statistics
+from array import array
+from itertools import combinations
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+from colorama import Fore, Style, init
+from game.controllers import CONTROLLERS
+from game.instrumentation import percentile
+from game.simulator import Simulator, SimulatorConfig
+
+# Normal approximation for a 95% confidence interval of the mean score
+Z_95 = 1.96
+
+
+def schedule(
+    logics: List[str], players: int, games: int, seed: int
+) -> List[Tuple[int, List[str]]]:
+    """
+    (seed, lineup) for every game. The lineups cycle through every group of
+    `players` strategies and rotate the join order, so each strategy gets every
+    starting position equally often.
+    """
+    matchups = list(combinations(logics, players))
+    jobs = []
+    for index in range(games):
+        lineup = list(matchups[index % len(matchups)])
+        shift = (index // len(matchups)) % players
+        jobs.append((seed + index, lineup[shift:] + lineup[:shift]))
+    return jobs
+
+
+def play_game(job: Tuple[int, List[str], dict]) -> Dict[str, tuple]:
+    """Play one game, returns name -> (score, moves, invalid, errors, tackles, decision times)."""
+    seed, lineup, settings = job
+    # RandomLogic draws from the global generator
+    random.seed(seed)
+    simulator = Simulator(SimulatorConfig(seed=seed, **settings))
+    results = simulator.play({name: CONTROLLERS[name]() for name in lineup})
+    return {
+        name: (
+            result.score,
+            result.moves,
+            result.invalid_moves,
+            result.errors,
+            result.tackles,
+            array("d", result.decision_seconds),
+        )
+        for name, result in results.items()
+    }
+
+
+def summarize(games: List[Dict[str, tuple]]) -> List[dict]:
+    """
+    Per strategy statistics over all games, best mean score first. A game is
+    won by every bot with the highest score, so ties count for each of them.
+    """
+    totals = {}
+    for game in games:
+        best = max(result[0] for result in game.values())
+        for name, (score, moves, invalid, errors, tackles, times) in game.items():
+            entry = totals.setdefault(
+                name,
+                {
+                    "logic": name,
+                    "scores": [],
+                    "wins": 0,
+                    "moves": 0,
+                    "invalid_moves": 0,
+                    "errors": 0,
+                    "tackles": 0,
+                    "times": array("d"),
+                },
+            )
+            entry["scores"].append(score)
+            entry["wins"] += score == best
+            entry["moves"] += moves
+            entry["invalid_moves"] += invalid
+            entry["errors"] += errors
+            entry["tackles"] += tackles
+            entry["times"].extend(times)
+
+    rows = []
+    for entry in totals.values():
+        scores = entry.pop("scores")
+        times = array("d", sorted(entry.pop("times")))
+        played = len(scores)
+        mean = statistics.fmean(scores)
+        spread = statistics.stdev(scores) if played > 1 else 0.0
+        entry.update(
+            games=played,
+            mean=mean,
+            ci=Z_95 * spread / math.sqrt(played),
+            stdev=spread,
+            decision_ms_mean=1000 * statistics.fmean(times) if times else 0.0,
+            decision_ms_p50=1000 * percentile(times, 0.50),
+            decision_ms_p95=1000 * percentile(times, 0.95),
+            decision_ms_max=1000 * (times[-1] if times else 0.0),
+        )
+        rows.append(entry)
+    rows.sort(key=lambda row: row["mean"], reverse=True)
+    return rows
+
+
+def print_table(rows: List[dict]):
+    header = "{:<10} {:>5} {:>14} {:>6} {:>7} {:>7} {:>6} {:>7} {:>20}".format(
+        "logic",
+        "games",
+        "score (95% CI)",
+        "wins",
+        "moves",
+        "invalid",
+        "errors",
+        "tackles",
+        "decision ms p50/p95/max",
+    )
+    print(Style.BRIGHT + header + Style.RESET_ALL)
+    for row in rows:
+        print(
+            "{:<10} {:>5} {:>14} {:>6} {:>7} {:>7} {:>6} {:>7} {:>20}".format(
+                row["logic"],
+                row["games"],
+                "{:.1f} ± {:.1f}".format(row["mean"], row["ci"]),
+                "{:.0%}".format(row["wins"] / row["games"]),
+                row["moves"],
+                row["invalid_moves"],
+                row["errors"],
+                row["tackles"],
+                "{:.2f}/{:.2f}/{:.1f}".format(
+                    row["decision_ms_p50"],
+                    row["decision_ms_p95"],
+                    row["decision_ms_max"],
+                ),
+            )
+        )
+
+
+if __name__ == "__main__":
+    init()
+    parser = argparse.ArgumentParser(
+        description="Play the logic controllers against each other on the offline simulator"
+    )
+    parser.add_argument(
+        "--logic",
+        help="Logic controllers to play. Default: all of {}".format(
+            ", ".join(CONTROLLERS)
+        ),
+        nargs="+",
+        default=list(CONTROLLERS),
+    )
+    parser.add_argument(
+        "--games", help="Number of games to play. Default: 100", default=100, type=int
+    )
+    parser.add_argument(
+        "--players",
+        help="Bots per game, games cycle through every group of this size. Default: all logics in every game",
+        type=int,
+    )
+    parser.add_argument(
+        "--seed", help="Seed of the first game. Default: 0", default=0, type=int
+    )
+    parser.add_argument(
+        "--processes",
+        help="Worker processes. Default: one per core",
+        default=multiprocessing.cpu_count(),
+        type=int,
+    )
+    group = parser.add_argument_group("Board")
+    group.add_argument("--width", default=15, type=int)
+    group.add_argument("--height", default=15, type=int)
+    group.add_argument(
+        "--session", help="Session length in seconds. Default: 60", default=60, type=int
+    )
+    group.add_argument(
+        "--delay", help="Milliseconds between moves. Default: 100", default=100, type=int
+    )
+    group.add_argument("--inventory-size", default=5, type=int)
+    group.add_argument("--teleporters", help="Teleporter pairs", default=1, type=int)
+    args = parser.parse_args()
+
+    invalid = [name for name in args.logic if name not in CONTROLLERS]
+    if invalid:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + "Error: "
+            + Style.RESET_ALL
+            + "Invalid logic controller: {}".format(", ".join(invalid))
+        )
+        exit(1)
+    players = args.players or len(args.logic)
+    if not 1 <= players <= len(args.logic):
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + "Error: "
+            + Style.RESET_ALL
+            + "--players must be between 1 and the number of logics"
+        )
+        exit(1)
+
+    settings = {
+        "width": args.width,
+        "height": args.height,
+        "session_length": args.session,
+        "minimum_delay_between_moves": args.delay,
+        "inventory_size": args.inventory_size,
+        "teleporter_pairs": args.teleporters,
+    }
+    jobs = [
+        (seed, lineup, settings)
+        for seed, lineup in schedule(args.logic, players, args.games, args.seed)
+    ]
+    processes = max(1, min(args.processes, len(jobs)))
+    print(
+        Fore.BLUE + Style.BRIGHT + "Tournament:" + Style.RESET_ALL,
+        "{} games of {} bots on {} processes".format(len(jobs), players, processes),
+    )
+
+    start = perf_counter()
+    # Games are independent and their results are small, so handing them out
+    # in chunks keeps the workers busy with little coordination overhead
+    chunksize = max(1, len(jobs) // (processes * 4))
+    with multiprocessing.Pool(processes) as pool:
+        games = list(pool.imap_unordered(play_game, jobs, chunksize))
+    elapsed = perf_counter() - start
+
+    print_table(summarize(games))
+    print(
+        Style.BRIGHT + "Time:" + Style.RESET_ALL,
+        "{:.1f} s, {:.1f} games/s".format(elapsed, len(games) / elapsed),
+    )